@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import CustomUser, Company, Job, JobApplication, Favorite
+from .models import (
+    CustomUser,
+    Company,
+    ExchangeRate,
+    Job,
+    JobApplication,
+    Favorite,
+    Task,
+)
 from django.contrib.auth.admin import UserAdmin
 
 # Register your models here.
@@ -16,7 +24,7 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
-    list_display = ("name", "description", "website", "owner", "created_at")
+    list_display = ("name", "description", "website", "location", "owner", "created_at")
     search_fields = ("name", "description", "website")
 
 
@@ -31,6 +39,8 @@ class JobAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
         "is_active",
+        "applications_count",
+        "favorites_count",
     )
     search_fields = (
         "title",
@@ -53,3 +63,15 @@ class JobApplicationAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("user", "job", "created_at")
     search_fields = ("user__email", "job__title")
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_at", "created_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("locked_by", "last_error", "created_at")
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("currency", "usd_rate", "updated_at")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConfigConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'config'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import dbpool  # noqa: F401
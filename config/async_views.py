@@ -0,0 +1,212 @@
+"""
+Async (ASGI) versions of the hot public read endpoints, served under
+/api/async/ next to the regular DRF views.
+
+They reuse the DRF viewsets' filtering, ordering, pagination and cache scopes
+and return the same JSON, but run queries through Django's async ORM and the
+async cache API, so a worker keeps serving other requests while one waits on
+the database or cache. Neither django-redis nor Django's cache backends have
+a native async client yet: `cache.aget()` and friends run the sync client in
+a thread, which keeps the event loop free but still costs a thread per call. Requests are always treated as anonymous: these
+endpoints only expose public data and share the anonymous response cache
+policy of the sync views.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import APIException, NotFound, Throttled
+from rest_framework.request import Request
+
+from .cache import (
+    aget_generations,
+    response_cache_key,
+    response_etag,
+    set_etag,
+    stats,
+)
+from .documents import astitch_documents, document_page_rows
+from .facets import job_facets
+from .renderers import ORJSONRenderer
+from .replicas import (
+    primary_reads_since,
+    reading_from,
+    replica_aliases,
+    replica_for,
+)
+from .representations import job_rows, render_job
+from .serializers import CompanySerializer
+from .throttling import SearchRateThrottle
+from .views import CompanyViewSet, JobViewSet
+
+renderer = ORJSONRenderer()
+
+
+def _json_response(data, status=200, cache_status=None):
+    response = HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
+    if cache_status is not None:
+        response["X-Cache"] = cache_status
+    return response
+
+
+def async_read_view(func):
+    """
+    Restricts a view to GET/HEAD, reads from a replica when one is fit and
+    renders DRF-style error payloads.
+    """
+
+    @wraps(func)
+    async def view(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        try:
+            alias = None
+            if replica_aliases():
+                alias = await sync_to_async(replica_for)(request)
+            with reading_from(alias):
+                return await func(request, *args, **kwargs)
+        except Http404 as exc:
+            error = NotFound(*exc.args)
+        except APIException as exc:
+            error = exc
+        detail = error.detail
+        data = detail if isinstance(detail, (list, dict)) else {"detail": detail}
+        response = _json_response(data, status=error.status_code)
+        if isinstance(error, Throttled) and error.wait is not None:
+            response["Retry-After"] = str(error.wait)
+        return response
+
+    return view
+
+
+def _viewset(viewset_class, request, basename, action, **kwargs):
+    """An initialised viewset to borrow querysets, filters and pagination from."""
+    return viewset_class(
+        request=Request(request),
+        basename=basename,
+        action=action,
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+    )
+
+
+async def _filtered_queryset(view):
+    # Building the queryset may touch the database (e.g. SQLite checks for its
+    # full-text table), so it runs in a worker thread.
+    return await sync_to_async(view.filter_queryset)(view.get_queryset())
+
+
+async def _cached(view, build):
+    namespace = f"async.{view.basename}.{view.action}"
+    if "pk" in view.kwargs:
+        namespace = f"{namespace}:{view.kwargs['pk']}"
+    generations = await aget_generations(view.get_cache_scopes())
+    key = response_cache_key(namespace, generations, view.request.query_params)
+    etag = response_etag(key, generations)
+    not_modified = get_conditional_response(view.request, etag=etag)
+    if not_modified is not None:
+        set_etag(not_modified, etag)
+        return not_modified
+
+    data = await cache.aget(key)
+    stats.record(hit=data is not None)
+    if data is not None:
+        response = _json_response(data, cache_status="HIT")
+    else:
+        with primary_reads_since(max(generations, default=0)):
+            data = await build()
+        await cache.aset(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        response = _json_response(data, cache_status="MISS")
+    set_etag(response, etag)
+    return response
+
+
+async def _paginated(view, queryset, render):
+    paginator = view.paginator
+    page = await paginator.apaginate_queryset(queryset, view.request, view)
+    if page is None:
+        return await render([row async for row in queryset])
+    return paginator.get_paginated_response(await render(page)).data
+
+
+async def _check_search_throttle(view):
+    throttle = SearchRateThrottle()
+    if throttle.applies(view.request, view):
+        if not await sync_to_async(throttle.allow_request)(view.request, view):
+            raise Throttled(throttle.wait())
+
+
+@async_read_view
+async def job_list(request):
+    view = _viewset(JobViewSet, request, "jobs", "list")
+    await _check_search_throttle(view)
+
+    async def build():
+        queryset = document_page_rows(await _filtered_queryset(view))
+        return await _paginated(view, queryset, astitch_documents)
+
+    return await _cached(view, build)
+
+
+@async_read_view
+async def job_detail(request, pk):
+    view = _viewset(JobViewSet, request, "jobs", "retrieve", pk=pk)
+
+    async def build():
+        queryset = job_rows(await _filtered_queryset(view))
+        row = await queryset.filter(pk=pk).afirst()
+        if row is None:
+            raise Http404("No Job matches the given query.")
+        return render_job(row)
+
+    return await _cached(view, build)
+
+
+@async_read_view
+async def job_facet_counts(request):
+    view = _viewset(JobViewSet, request, "jobs", "facets")
+    await _check_search_throttle(view)
+
+    async def build():
+        # Postgres facets come from a raw GROUPING SETS query, which has no
+        # async ORM counterpart.
+        return await sync_to_async(job_facets)(await _filtered_queryset(view))
+
+    return await _cached(view, build)
+
+
+async def _render_companies(companies):
+    # The queryset selects each owner, so serializing needs no queries.
+    return CompanySerializer(companies, many=True).data
+
+
+@async_read_view
+async def company_list(request):
+    view = _viewset(CompanyViewSet, request, "companies", "list")
+
+    async def build():
+        queryset = await _filtered_queryset(view)
+        return await _paginated(view, queryset, _render_companies)
+
+    return await _cached(view, build)
+
+
+@async_read_view
+async def company_detail(request, pk):
+    view = _viewset(CompanyViewSet, request, "companies", "retrieve", pk=pk)
+
+    async def build():
+        queryset = await _filtered_queryset(view)
+        company = await queryset.filter(pk=pk).afirst()
+        if company is None:
+            raise Http404("No Company matches the given query.")
+        return CompanySerializer(company).data
+
+    return await _cached(view, build)
@@ -0,0 +1,252 @@
+"""
+Authentication classes that avoid repeating expensive work on every request.
+
+Access tokens carry the user's id, email, role, superuser flag and
+token_version. `StatelessJWTAuthentication` turns those claims into a
+`TokenUser` whose other fields are deferred, so requests that only check
+identity and role never load the user row. Revocation stays correct through
+the token version: it is bumped whenever the password, role, superuser flag or
+active flag changes, and each request compares the token's version with the
+current one, cached for `TOKEN_VERSION_CACHE_TIMEOUT` seconds. Tokens issued
+before these claims existed are still looked up, and only accepted while the
+user's token_version is the initial 0.
+
+Owned company ids are deliberately not a claim: they would go stale for up to
+the refresh token's lifetime whenever a company is created or changes hands.
+Queries that need them filter on the owner instead (e.g.
+`job__company__owner=user`), which costs a join rather than a query.
+
+`CachedBasicAuthentication` skips the password hash and the user query on
+repeat requests: it remembers the user each set of credentials verified, for
+`BASIC_AUTH_CACHE_TTL` seconds in a bounded per-process LRU keyed on an HMAC
+of the credentials. A hit is only honoured while the user's token_version is
+unchanged, so a new password, role or active flag ends it as it ends JWTs;
+other profile changes may take up to the TTL to show. Failed attempts are
+counted in the shared cache per client and username, so one client can't
+lock other clients out of an account, and per client across usernames. A
+successful login clears its client and username count.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.authentication import BasicScheme
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.authentication import BasicAuthentication
+from rest_framework import exceptions
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser, TokenUser
+
+TOKEN_VERSION_CLAIM = "ver"
+TOKEN_VERSION_PREFIX = "tokver:"
+# Cached for users that are inactive or gone, so they can't cause a query
+# per request either.
+REVOKED = -1
+
+# (claim, TokenUser attribute)
+USER_CLAIMS = [
+    ("email", "email"),
+    ("role", "role"),
+    ("is_superuser", "is_superuser"),
+    (TOKEN_VERSION_CLAIM, "token_version"),
+]
+
+
+def add_user_claims(token, user):
+    for claim, attribute in USER_CLAIMS:
+        token[claim] = getattr(user, attribute)
+    return token
+
+
+def current_token_version(user_id):
+    key = f"{TOKEN_VERSION_PREFIX}{user_id}"
+    version = cache.get(key)
+    if version is None:
+        version = (
+            CustomUser.objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = REVOKED
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def remember_token_version(user):
+    """Primes the cached version from a user row that was loaded anyway."""
+    key = f"{TOKEN_VERSION_PREFIX}{user.pk}"
+    cache.add(key, user.token_version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+
+
+def forget_token_version_on_commit(user_id):
+    key = f"{TOKEN_VERSION_PREFIX}{user_id}"
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim, _ in USER_CLAIMS):
+            # Issued before these claims existed; fall back to a lookup. Such
+            # tokens predate every token_version bump.
+            user = super().get_user(validated_token)
+            if user.token_version != validated_token.get(TOKEN_VERSION_CLAIM, 0):
+                raise AuthenticationFailed(
+                    _("Token has been revoked"), code="token_revoked"
+                )
+            return user
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationFailed(
+                _("Token contained no recognizable user identification")
+            )
+
+        version = current_token_version(user_id)
+        if version == REVOKED:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if validated_token[TOKEN_VERSION_CLAIM] != version:
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+
+        known = {"id": user_id, "is_active": True}
+        for claim, attribute in USER_CLAIMS:
+            known[attribute] = validated_token[claim]
+        # from_db() expects values in field order.
+        field_names = [
+            field.attname
+            for field in TokenUser._meta.concrete_fields
+            if field.attname in known
+        ]
+        values = [known[name] for name in field_names]
+        return TokenUser.from_db(CustomUser.objects.db, field_names, values)
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    # Accepts the same tokens as JWTAuthentication, so documents the same scheme.
+    target_class = "config.authentication.StatelessJWTAuthentication"
+
+
+class VerifiedCredentials:
+    """
+    Thread-safe LRU mapping credential digests to the user they verified and
+    the user's token_version at the time, each valid for `ttl` seconds.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            # Callers may modify the user; keep the cached one pristine.
+            return copy.copy(user)
+
+    def add(self, digest, user):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_credentials = VerifiedCredentials(
+    settings.BASIC_AUTH_CACHE_SIZE, settings.BASIC_AUTH_CACHE_TTL
+)
+
+BASIC_AUTH_FAILURE_PREFIX = "basicauth:fail:"
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    def authenticate_credentials(self, userid, password, request=None):
+        pair_key, client_key = self._failure_keys(userid, request)
+        self._check_failures(pair_key, client_key)
+
+        digest = self._digest(userid, password)
+        user = verified_credentials.get(digest)
+        if user is not None:
+            # A changed password, role or active flag bumps token_version.
+            if current_token_version(user.pk) == user.token_version:
+                return (user, None)
+            verified_credentials.discard(digest)
+
+        try:
+            user, auth = super().authenticate_credentials(userid, password, request)
+        except exceptions.AuthenticationFailed:
+            self._record_failure([pair_key, client_key])
+            raise
+        cache.delete(pair_key)
+        remember_token_version(user)
+        verified_credentials.add(digest, user)
+        return (user, auth)
+
+    def _digest(self, userid, password):
+        return salted_hmac(
+            "config.authentication.CachedBasicAuthentication",
+            "\0".join([userid, password]),
+        ).hexdigest()
+
+    def _failure_keys(self, userid, request):
+        """
+        Keys counting failures for this username from this client, and for
+        this client across every username.
+        """
+        client = BaseThrottle().get_ident(request) if request is not None else "-"
+        username = salted_hmac(BASIC_AUTH_FAILURE_PREFIX, userid).hexdigest()
+        return (
+            f"{BASIC_AUTH_FAILURE_PREFIX}client:{client}:user:{username}",
+            f"{BASIC_AUTH_FAILURE_PREFIX}client:{client}",
+        )
+
+    def _check_failures(self, pair_key, client_key):
+        counts = cache.get_many([pair_key, client_key])
+        if (
+            counts.get(pair_key, 0) >= settings.BASIC_AUTH_FAILURE_LIMIT
+            or counts.get(client_key, 0) >= settings.BASIC_AUTH_CLIENT_FAILURE_LIMIT
+        ):
+            raise exceptions.Throttled(wait=settings.BASIC_AUTH_FAILURE_WINDOW)
+
+    def _record_failure(self, keys):
+        window = settings.BASIC_AUTH_FAILURE_WINDOW
+        for key in keys:
+            # The window starts at the first failure and is not extended.
+            cache.add(key, 0, window)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, window)
+
+
+class CachedBasicScheme(BasicScheme):
+    # Accepts the same credentials as BasicAuthentication.
+    target_class = "config.authentication.CachedBasicAuthentication"
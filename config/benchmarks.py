@@ -0,0 +1,179 @@
+"""
+Helpers shared by the `bench_*` management commands: a throwaway seeded
+dataset that is rolled back once the benchmark is done.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .geo import coordinates
+from .models import (
+    Company,
+    Currency,
+    CustomUser,
+    ExperienceLevel,
+    Favorite,
+    Job,
+    JobApplication,
+    JobMode,
+)
+from .salaries import to_usd, usd_rates
+
+CATEGORIES = [
+    "engineering",
+    "finance",
+    "design",
+    "marketing",
+    "sales",
+    "support",
+    "operations",
+    "legal",
+    "product",
+    "data",
+    "security",
+    "healthcare",
+    "education",
+    "logistics",
+    "hospitality",
+    "construction",
+]
+LOCATIONS = ["Nairobi", "Lagos", "Accra", "Kigali", "Cairo", "Remote", "Kampala"]
+STATUSES = [status for status, _ in JobApplication.STATUS_CHOICES]
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Runs the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def seed_dataset(jobs=20000, users=2000, companies=200, seed=0, batch_size=2000):
+    """
+    Bulk-inserts a synthetic but realistically skewed dataset and refreshes
+    planner statistics. Signals are bypassed, so derived data (search
+    documents and the like) is not built; only the indexed columns
+    (coordinates, salary_usd, counters) are filled in directly.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                username=f"bench-user-{i}",
+                email=f"bench-user-{i}@example.com",
+                password="!",
+            )
+            for i in range(users)
+        ],
+        batch_size=batch_size,
+    )
+    user_ids = list(
+        CustomUser.objects.filter(username__startswith="bench-user-").values_list(
+            "id", flat=True
+        )
+    )
+
+    company_rows = []
+    for i in range(companies):
+        location = rng.choice(LOCATIONS)
+        latitude, longitude = coordinates(location)
+        company_rows.append(
+            Company(
+                name=f"Bench Company {i}",
+                description="Benchmark company",
+                owner_id=rng.choice(user_ids),
+                location=location,
+                latitude=latitude,
+                longitude=longitude,
+            )
+        )
+    Company.objects.bulk_create(company_rows, batch_size=batch_size)
+    company_ids = list(
+        Company.objects.filter(name__startswith="Bench Company ").values_list(
+            "id", flat=True
+        )
+    )
+
+    rates = usd_rates()
+    job_rows = []
+    for i in range(jobs):
+        min_years = rng.choice([None, 0, 1, 2, 3, 5, 8])
+        location = rng.choice(LOCATIONS)
+        latitude, longitude = coordinates(location)
+        salary = rng.choice([None, rng.randrange(500, 300000, 500)])
+        salary_currency = rng.choice(Currency.values)
+        job_rows.append(
+            Job(
+                title=f"{rng.choice(CATEGORIES).title()} role {i}",
+                description="Benchmark job description " * 8,
+                company_id=rng.choice(company_ids),
+                location=location,
+                latitude=latitude,
+                longitude=longitude,
+                posted_by_id=rng.choice(user_ids),
+                is_active=rng.random() < 0.7,
+                experience=rng.choice(ExperienceLevel.values + [None]),
+                min_experience_years=min_years,
+                max_experience_years=(
+                    None if min_years is None else min_years + rng.randint(1, 5)
+                ),
+                mode=rng.choice(JobMode.values),
+                salary=salary,
+                salary_currency=salary_currency,
+                salary_usd=to_usd(salary, salary_currency, rates),
+                category=rng.choice(CATEGORIES),
+                # Rough popularity skew; the counters aren't reconciled with
+                # the seeded applications and favorites.
+                applications_count=int(rng.paretovariate(1.5)) - 1,
+                favorites_count=int(rng.paretovariate(1.5)) - 1,
+            )
+        )
+    Job.objects.bulk_create(job_rows, batch_size=batch_size)
+    job_ids = list(
+        Job.objects.filter(company_id__in=company_ids).values_list("id", flat=True)
+    )
+
+    # created_at is auto_now_add, so spread it out after the fact.
+    for offset in range(0, len(job_ids), batch_size):
+        batch = Job.objects.filter(id__in=job_ids[offset : offset + batch_size])
+        updated = []
+        for job in batch.only("id"):
+            job.created_at = now - timedelta(minutes=rng.randrange(0, 525600))
+            updated.append(job)
+        Job.objects.bulk_update(updated, ["created_at"])
+
+    pairs = set()
+    while len(pairs) < min(jobs, len(job_ids) * len(user_ids)):
+        pairs.add((rng.choice(job_ids), rng.choice(user_ids)))
+    JobApplication.objects.bulk_create(
+        [
+            JobApplication(
+                job_id=job_id, applicant_id=user_id, status=rng.choice(STATUSES)
+            )
+            for job_id, user_id in pairs
+        ],
+        batch_size=batch_size,
+    )
+    Favorite.objects.bulk_create(
+        [Favorite(user_id=user_id, job_id=job_id) for job_id, user_id in pairs],
+        batch_size=batch_size,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    return {"users": user_ids, "companies": company_ids, "jobs": job_ids}
@@ -0,0 +1,202 @@
+"""
+Versioned response cache for public read endpoints.
+
+Cached entries are keyed on generation counters ("scopes") such as `jobs`,
+`job:<id>` or `company:<id>`. Writes never delete entries; they bump the
+relevant generations so old keys simply stop being read and expire on their
+own. Bumping is implemented by deleting the counter: the next reader
+initialises it to a fresh, unique value.
+
+With Redis configured the counters are shared by every worker; the
+local-memory fallback is per process and therefore only suitable for
+development or single-process deployments.
+"""
+
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.response import Response
+
+from .metrics import CACHE_REQUESTS
+from .replicas import primary_reads_since
+
+GENERATION_PREFIX = "gen:"
+RESPONSE_PREFIX = "resp:"
+
+
+class CacheStats:
+    """Process-local hit/miss counters for the response cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        CACHE_REQUESTS.labels("hit" if hit else "miss").inc()
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def get_generations(scopes):
+    keys = [GENERATION_PREFIX + scope for scope in scopes]
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        # Another worker may have won the add() race; read back the winner.
+        values.update(cache.get_many(missing))
+    return [values.get(key, 0) for key in keys]
+
+
+async def aget_generations(scopes):
+    keys = [GENERATION_PREFIX + scope for scope in scopes]
+    values = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, time.time_ns(), None)
+        values.update(await cache.aget_many(missing))
+    return [values.get(key, 0) for key in keys]
+
+
+def bump_generations(scopes):
+    cache.delete_many([GENERATION_PREFIX + scope for scope in set(scopes)])
+
+
+def bump_generations_on_commit(scopes):
+    scopes = list(scopes)
+    transaction.on_commit(lambda: bump_generations(scopes))
+
+
+def normalize_query(query_params):
+    """
+    Sorted query string so reordered parameters share a key. Blank values are
+    kept: they can be meaningful, e.g. a bare `?cursor=` opts into keyset
+    pagination.
+    """
+    items = sorted(
+        (key, value) for key in query_params for value in query_params.getlist(key)
+    )
+    return urlencode(items)
+
+
+def response_cache_key(namespace, generations, query_params):
+    generations = ".".join(str(value) for value in generations)
+    query = hashlib.md5(normalize_query(query_params).encode()).hexdigest()
+    return f"{RESPONSE_PREFIX}{namespace}:{generations}:{query}"
+
+
+def response_etag(key, generations):
+    """
+    ETag for a response cached under `key`. It comes from the generations
+    alone, so checking it needs no query. Returns None when a generation is
+    unknown, e.g. while the cache is unreachable.
+
+    No Last-Modified is sent: its one-second resolution can't tell apart two
+    generations created within the same second.
+    """
+    if not generations or not all(generations):
+        return None
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def set_etag(response, etag):
+    if etag is None or response.status_code not in (200, 304):
+        return
+    response["ETag"] = etag
+    # Let browsers and CDNs store the response but revalidate every use.
+    patch_cache_control(response, no_cache=True)
+
+
+class CachedReadMixin:
+    """
+    Caches anonymous GET responses of the actions listed in `cached_actions`
+    and answers conditional requests for them with 304 before any work is
+    done. Views declare which generations an action depends on through
+    `get_cache_scopes()`.
+    """
+
+    cached_actions = ("list", "retrieve")
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def is_response_conditional(self, request):
+        return self.action in self.cached_actions and request.method in (
+            "GET",
+            "HEAD",
+        )
+
+    def is_response_cacheable(self, request):
+        return (
+            self.is_response_conditional(request) and not request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request, generations):
+        namespace = f"{self.basename}.{self.action}"
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is not None:
+            namespace = f"{namespace}:{lookup}"
+        if request.user.is_authenticated:
+            # Never cached, but ETags must differ per user.
+            namespace = f"{namespace}:user{request.user.pk}"
+        return response_cache_key(namespace, generations, request.query_params)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if not self.is_response_conditional(request):
+            return handler(request, *args, **kwargs)
+
+        generations = get_generations(self.get_cache_scopes())
+        key = self.get_response_cache_key(request, generations)
+        etag = response_etag(key, generations)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            set_etag(not_modified, etag)
+            return not_modified
+
+        entry = None
+        if self.is_response_cacheable(request):
+            entry = cache.get(key)
+            stats.record(hit=entry is not None)
+        if entry is not None:
+            response = Response(entry, headers={"X-Cache": "HIT"})
+        else:
+            # A generation is created by the first read after a write, so a
+            # young one means a replica may not have the write yet.
+            with primary_reads_since(max(generations, default=0)):
+                response = handler(request, *args, **kwargs)
+            if self.is_response_cacheable(request):
+                if response.status_code == 200:
+                    cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+                response["X-Cache"] = "MISS"
+        set_etag(response, etag)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
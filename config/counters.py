@@ -0,0 +1,112 @@
+"""
+Denormalized popularity counters on Job.
+
+Applications and favorites are counted on the job row itself so listings can
+order by popularity without aggregating the whole table. Views call these
+helpers inside the transaction that creates, updates or deletes the related
+row; each one issues a single `UPDATE ... SET count = count + 1`, so
+concurrent requests never lose increments. Anything that bypasses them
+(admin deletes, user deletion cascades) is repaired by
+`manage.py reconcile_job_counters`.
+
+Counters are not part of the job payload, so changing them neither
+re-renders documents nor touches `updated_at`; only listings ordered by a
+counter depend on the COUNTERS_SCOPE generation.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .cache import bump_generations_on_commit
+from .models import Favorite, Job, JobApplication
+
+COUNTERS_SCOPE = "job-counters"
+
+STATUS_COUNTERS = {
+    status: f"{status}_count" for status, _ in JobApplication.STATUS_CHOICES
+}
+# Only these two are indexed (job_applications_count_idx and
+# job_favorites_count_idx), so they are the only counters listings can order by.
+ORDERING_COUNTERS = ["applications_count", "favorites_count"]
+COUNTER_FIELDS = [*ORDERING_COUNTERS, *STATUS_COUNTERS.values()]
+
+
+def _add(job_id, **deltas):
+    updates = {}
+    for field, delta in deltas.items():
+        # Drifted counters must not fail a request by going negative.
+        updates[field] = (
+            F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        )
+    Job.objects.filter(pk=job_id).update(**updates)
+    bump_generations_on_commit([COUNTERS_SCOPE])
+
+
+def application_created(application):
+    _add(
+        application.job_id,
+        applications_count=1,
+        **{STATUS_COUNTERS[application.status]: 1},
+    )
+
+
+def application_status_changed(job_id, previous_status, status):
+    if previous_status != status:
+        _add(
+            job_id,
+            **{STATUS_COUNTERS[previous_status]: -1, STATUS_COUNTERS[status]: 1},
+        )
+
+
+def favorite_created(favorite):
+    _add(favorite.job_id, favorites_count=1)
+
+
+def favorite_deleted(favorite):
+    _add(favorite.job_id, favorites_count=-1)
+
+
+def reconcile(job_ids):
+    """
+    Recounts the given jobs' counters and repairs the ones that drifted.
+    Returns how many jobs were repaired. The job rows stay locked while
+    counting, so concurrent increments land either before the recount (and
+    are included) or after it (and are applied on top).
+    """
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update()
+            .filter(pk__in=job_ids)
+            .only("pk", *COUNTER_FIELDS)
+        )
+        actual = {job.pk: dict.fromkeys(COUNTER_FIELDS, 0) for job in jobs}
+        applications = (
+            JobApplication.objects.filter(job_id__in=actual)
+            .order_by()
+            .values_list("job_id", "status")
+            .annotate(count=Count("pk"))
+        )
+        for job_id, status, count in applications:
+            actual[job_id]["applications_count"] += count
+            actual[job_id][STATUS_COUNTERS[status]] += count
+        favorites = (
+            Favorite.objects.filter(job_id__in=actual)
+            .order_by()
+            .values_list("job_id")
+            .annotate(count=Count("pk"))
+        )
+        for job_id, count in favorites:
+            actual[job_id]["favorites_count"] = count
+
+        drifted = []
+        for job in jobs:
+            counts = actual[job.pk]
+            if any(getattr(job, field) != counts[field] for field in COUNTER_FIELDS):
+                for field, count in counts.items():
+                    setattr(job, field, count)
+                drifted.append(job)
+        if drifted:
+            Job.objects.bulk_update(drifted, COUNTER_FIELDS)
+            bump_generations_on_commit([COUNTERS_SCOPE])
+    return len(drifted)
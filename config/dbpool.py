@@ -0,0 +1,53 @@
+"""
+Helpers around Django's psycopg 3 connection pools (see DATABASE_POOL in
+settings).
+
+Pools belong to a process: each gunicorn worker opens its own, lazily, on
+its first query. They are thread-safe and not tied to an event loop, so the
+threads async views run their queries in share them too. A process forked
+after opening connections (e.g. gunicorn with --preload, or multiprocessing)
+must not reuse the parent's sockets, so the child drops everything it
+inherited on fork and starts with fresh pools.
+"""
+
+import os
+
+from django.db import connections
+
+# Connections and pools inherited by a forked child. They are kept referenced
+# so garbage collection never closes the sockets the parent still uses.
+_inherited = []
+
+
+def connection_pools():
+    """{alias: pool} of the pools this process has created so far."""
+    pools = {}
+    for alias in connections:
+        created = getattr(type(connections[alias]), "_connection_pools", {})
+        if alias in created:
+            pools[alias] = created[alias]
+    return pools
+
+
+def pool_stats():
+    """
+    {alias: stats} for every open pool, as returned by psycopg_pool's
+    `get_stats()`: current `pool_size`, `pool_available` and
+    `requests_waiting` plus counters such as `requests_wait_ms` and
+    `connections_errors` since the pool was created.
+    """
+    return {alias: pool.get_stats() for alias, pool in connection_pools().items()}
+
+
+def forget_inherited_connections():
+    for alias, pool in connection_pools().items():
+        _inherited.append(pool)
+        del type(connections[alias])._connection_pools[alias]
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _inherited.append(connection.connection)
+            connection.connection = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=forget_inherited_connections)
@@ -0,0 +1,115 @@
+"""
+Denormalized per-job documents.
+
+Every job's list payload is rendered once into JobDocument and re-rendered
+when the job, its company or its poster changes. List requests only select
+the page's ids and ordering keys from config_job and fetch the matching
+documents by primary key, without joins or model instantiation.
+
+Documents are only stored by the write path and `manage.py
+rebuild_job_documents`, always from primary rows; reads never write. Bump
+DOCUMENT_VERSION whenever render_job()'s output changes: outdated documents
+are then ignored and rendered on the fly until `rebuild_job_documents
+--outdated` (run on every deploy by entrypoint.sh) stores the new ones.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS
+
+from .counters import COUNTER_FIELDS
+from .models import Job, JobDocument
+from .representations import job_rows, render_job
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+DOCUMENT_VERSION = 2
+
+# Columns a page query needs besides the id: every ordering key, so keyset
+# pagination can build its cursor from the page rows.
+ORDERING_COLUMNS = [
+    "created_at",
+    "title",
+    "salary",
+    "salary_usd",
+    "min_experience_years",
+    *COUNTER_FIELDS,
+]
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _render(jobs):
+    """{id: payload} of the jobs in the `jobs` queryset."""
+    return {row["id"]: render_job(row) for row in job_rows(jobs)}
+
+
+def render_documents(job_ids):
+    """(Re-)renders and upserts the documents of the given jobs."""
+    # Stored documents must never come from a lagging replica.
+    rendered = _render(Job.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=job_ids))
+    documents = [
+        JobDocument(job_id=job_id, version=DOCUMENT_VERSION, body=_dumps(data))
+        for job_id, data in rendered.items()
+    ]
+    if documents:
+        JobDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=["job"],
+            update_fields=["version", "body", "rendered_at"],
+        )
+    return rendered
+
+
+def document_page_rows(queryset):
+    """Narrows a Job queryset to what's needed to paginate it."""
+    return queryset.values("id", *ORDERING_COLUMNS, *queryset.query.annotations)
+
+
+def stitch_documents(rows):
+    """
+    Returns the rendered payloads of `rows` (dicts with an "id"), in order.
+    Missing or outdated documents are rendered on the spot, from the same
+    database as the page, but not stored.
+    """
+    ids = [row["id"] for row in rows]
+    documents = {
+        job_id: _loads(body)
+        for job_id, body in JobDocument.objects.filter(
+            job_id__in=ids, version=DOCUMENT_VERSION
+        ).values_list("job_id", "body")
+    }
+    missing = [job_id for job_id in ids if job_id not in documents]
+    if missing:
+        documents.update(_render(Job.objects.filter(pk__in=missing)))
+    return [documents[job_id] for job_id in ids if job_id in documents]
+
+
+async def astitch_documents(rows):
+    """Async counterpart of `stitch_documents()`."""
+    ids = [row["id"] for row in rows]
+    documents = {
+        job_id: _loads(body)
+        async for job_id, body in JobDocument.objects.filter(
+            job_id__in=ids, version=DOCUMENT_VERSION
+        ).values_list("job_id", "body")
+    }
+    missing = [job_id for job_id in ids if job_id not in documents]
+    if missing:
+        documents.update(
+            await sync_to_async(_render)(Job.objects.filter(pk__in=missing))
+        )
+    return [documents[job_id] for job_id in ids if job_id in documents]
@@ -0,0 +1,88 @@
+from django.db import connections
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+FACET_FIELDS = ["category", "mode", "experience", "salary_currency", "location"]
+SALARY_FACET = "salary"
+
+# (label, lower bound inclusive, upper bound exclusive)
+SALARY_BUCKETS = [
+    ("0-24999", 0, 25000),
+    ("25000-49999", 25000, 50000),
+    ("50000-99999", 50000, 100000),
+    ("100000-199999", 100000, 200000),
+    ("200000+", 200000, None),
+]
+
+# Free-text facets can have a long tail; only the most common values are
+# returned for them.
+FACET_LIMITS = {"location": 20, "category": 50}
+
+
+def salary_bucket():
+    whens = []
+    for label, lower, upper in SALARY_BUCKETS:
+        condition = Q(salary__gte=lower)
+        if upper is not None:
+            condition &= Q(salary__lt=upper)
+        whens.append(When(condition, then=Value(label)))
+    return Case(*whens, default=Value(None), output_field=CharField())
+
+
+def job_facets(queryset):
+    """
+    Counts jobs per value of every facet for an already filtered queryset,
+    in a single query. Postgres gets a GROUPING SETS aggregation; other
+    databases group by every facet column at once and fold the combinations
+    in Python.
+    """
+    columns = FACET_FIELDS + ["salary_bucket"]
+    rows = queryset.order_by().annotate(salary_bucket=salary_bucket()).values(*columns)
+    if connections[queryset.db].vendor == "postgresql":
+        counts = _grouping_sets_counts(rows, columns)
+    else:
+        counts = _combination_counts(rows, columns)
+
+    names = FACET_FIELDS + [SALARY_FACET]
+    facets = {}
+    for name, column in zip(names, columns):
+        values = sorted(
+            counts[column].items(),
+            key=lambda item: (-item[1], item[0] is None, item[0] or ""),
+        )
+        limit = FACET_LIMITS.get(name)
+        facets[name] = [
+            {"value": value, "count": count} for value, count in values[:limit]
+        ]
+    total = sum(counts[columns[0]].values())
+    return {"count": total, "facets": facets}
+
+
+def _combination_counts(rows, columns):
+    counts = {column: {} for column in columns}
+    for row in rows.annotate(facet_count=Count("id")):
+        for column in columns:
+            bucket = counts[column]
+            value = row[column]
+            bucket[value] = bucket.get(value, 0) + row["facet_count"]
+    return counts
+
+
+def _grouping_sets_counts(rows, columns):
+    inner_sql, params = rows.query.sql_with_params()
+    select = ", ".join(columns)
+    grouping = ", ".join(f"GROUPING({column})" for column in columns)
+    sets = ", ".join(f"({column})" for column in columns)
+    sql = (
+        f"SELECT {select}, COUNT(*), {grouping} FROM ({inner_sql}) facet_rows "
+        f"GROUP BY GROUPING SETS ({sets})"
+    )
+    counts = {column: {} for column in columns}
+    with connections[rows.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        width = len(columns)
+        for row in cursor.fetchall():
+            values, count, flags = row[:width], row[width], row[width + 1 :]
+            # GROUPING(column) is 0 for the column the row was grouped by.
+            index = flags.index(0)
+            counts[columns[index]][values[index]] = count
+    return counts
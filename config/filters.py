@@ -1,4 +1,11 @@
-from .models import Job
+from decimal import ROUND_CEILING, ROUND_FLOOR
+
+from .geo import within
+from .models import Currency, Job
+from .salaries import to_usd, usd_rates
+from .search import search_jobs
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter, SearchFilter
 import django_filters
 
 
@@ -38,6 +45,14 @@ class JobFilter(django_filters.FilterSet):
         field_name="max_experience_years", lookup_expr="lte"
     )
 
+    # Switches the salary filters (and `?ordering=salary`) to compare
+    # salaries converted to a common currency; amounts are given in this one.
+    salary_in = django_filters.ChoiceFilter(
+        choices=Currency.choices,
+        method="filter_salary_in",
+        label="Currency of the salary filters; compares salaries across currencies.",
+    )
+
     class Meta:
         model = Job
         fields = [
@@ -49,3 +64,156 @@ class JobFilter(django_filters.FilterSet):
             "mode",
             "salary_currency",
         ]
+
+    def filter_salary_in(self, queryset, name, value):
+        # Applied to the salary filters themselves in filter_queryset().
+        return queryset
+
+    def filter_queryset(self, queryset):
+        currency = self.form.cleaned_data.get("salary_in")
+        if not currency:
+            return super().filter_queryset(queryset)
+        rates = usd_rates()
+        for name, value in self.form.cleaned_data.items():
+            filter_ = self.filters[name]
+            if filter_.field_name != "salary" or value is None:
+                queryset = filter_.filter(queryset, value)
+                continue
+            # Round lower bounds up and upper bounds down.
+            rounding = (
+                ROUND_CEILING if filter_.lookup_expr in ("gt", "gte") else ROUND_FLOOR
+            )
+            amount = to_usd(value, currency, rates, rounding)
+            if amount is None:
+                return queryset.none()
+            queryset = queryset.filter(**{f"salary_usd__{filter_.lookup_expr}": amount})
+        return queryset
+
+
+class JobSearchFilter(SearchFilter):
+    """
+    Full-text search over each job's maintained search document. Falls back to
+    the view's `search_fields` icontains search when no engine is available.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        searched = search_jobs(queryset, terms)
+        if searched is None:
+            return super().filter_queryset(request, queryset, view)
+        return searched
+
+
+class NearFilter(BaseFilterBackend):
+    """
+    `?near=<lat>,<lng>&radius_km=<km>`: keeps rows whose geocoded location is
+    within the radius and orders them nearest first, unless an explicit
+    `?ordering=` is given. Rows without coordinates are left out.
+    """
+
+    near_param = "near"
+    radius_param = "radius_km"
+    default_radius_km = 25
+    max_radius_km = 500
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return queryset
+        latitude, longitude = self.parse_point(near)
+        radius_km = self.parse_radius(request.query_params.get(self.radius_param))
+        return within(queryset, latitude, longitude, radius_km)
+
+    def parse_point(self, value):
+        try:
+            latitude, longitude = (float(part) for part in value.split(","))
+        except ValueError:
+            latitude = longitude = None
+        if (
+            latitude is None
+            or not -90 <= latitude <= 90
+            or not -180 <= longitude <= 180
+        ):
+            raise ValidationError(
+                {self.near_param: ["Expected <latitude>,<longitude> in degrees."]}
+            )
+        return latitude, longitude
+
+    def parse_radius(self, value):
+        if value in (None, ""):
+            return self.default_radius_km
+        try:
+            radius_km = float(value)
+        except ValueError:
+            radius_km = None
+        if radius_km is None or not 0 < radius_km <= self.max_radius_km:
+            raise ValidationError(
+                {
+                    self.radius_param: [
+                        f"Expected a distance in km up to {self.max_radius_km}."
+                    ]
+                }
+            )
+        return radius_km
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.near_param,
+                "required": False,
+                "in": "query",
+                "description": "Only results near this point, as "
+                "`<latitude>,<longitude>`, nearest first.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.radius_param,
+                "required": False,
+                "in": "query",
+                "description": f"Radius around `{self.near_param}` in km "
+                f"(default {self.default_radius_km}, at most "
+                f"{self.max_radius_km}).",
+                "schema": {"type": "number"},
+            },
+        ]
+
+
+class JobOrderingFilter(OrderingFilter):
+    """
+    Adds `?ordering=relevance` and `?ordering=distance` on top of the regular
+    ordering fields. They only take effect when a search ranked the results,
+    or a `near` filter measured their distance, and are ignored otherwise.
+    With `?salary_in=`, `?ordering=salary` orders by normalized salary.
+    """
+
+    relevance_param = "relevance"
+    distance_param = "distance"
+    # `?salary_in=` compares salaries across currencies, so it orders by
+    # the normalized column too.
+    normalized_fields = {"salary": "salary_usd"}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        annotations = queryset.query.annotations
+        resolved = []
+        for term in ordering:
+            name = term.lstrip("-")
+            if name == self.relevance_param:
+                if "search_rank" in annotations:
+                    resolved.append(
+                        "search_rank" if term.startswith("-") else "-search_rank"
+                    )
+            elif name == self.distance_param:
+                if "distance_km" in annotations:
+                    resolved.append(term.replace(name, "distance_km"))
+            elif name in self.normalized_fields and request.query_params.get(
+                "salary_in"
+            ):
+                resolved.append(term.replace(name, self.normalized_fields[name]))
+            else:
+                resolved.append(term)
+        return resolved
@@ -0,0 +1,152 @@
+"""
+Offline geocoding and radius search.
+
+Free-text locations ("Nairobi", "Lagos, Nigeria", "Munich, DE") are resolved
+against the bundled city gazetteer in `data/cities.csv`, so no network call
+is ever made. Jobs and companies store the coordinates of their location
+(see config.signals), or none when it isn't a known city (e.g. "Remote").
+
+Radius queries first narrow rows to the circle's bounding box, a range scan
+on the (latitude, longitude) indexes, and only then compute haversine
+distances for the rows inside it, so their cost grows with the number of
+nearby rows rather than with the table.
+"""
+
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "cities.csv"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+COORDINATE_FIELDS = ["latitude", "longitude"]
+
+# Spellings of countries the gazetteer doesn't list under their own name.
+COUNTRY_ALIASES = {
+    "usa": "US",
+    "united states of america": "US",
+    "america": "US",
+    "uk": "GB",
+    "great britain": "GB",
+    "england": "GB",
+    "scotland": "GB",
+    "wales": "GB",
+    "uae": "AE",
+    "drc": "CD",
+    "cote d'ivoire": "CI",
+    "czechia": "CZ",
+    "holland": "NL",
+}
+
+
+def normalize(text):
+    """Lowercase, accent-free and single-spaced, for name lookups."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.replace(".", " ").lower().split())
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """
+    ({normalized city name: [(country code, latitude, longitude), ...]},
+    {normalized country name or code: country code}). Cities sharing a name
+    are listed in file order, i.e. most populous first.
+    """
+    cities, countries = {}, {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            entry = (
+                row["country_code"],
+                float(row["latitude"]),
+                float(row["longitude"]),
+            )
+            names = [row["name"], *filter(None, row["alternate_names"].split("|"))]
+            for name in names:
+                cities.setdefault(normalize(name), []).append(entry)
+            countries[normalize(row["country"])] = row["country_code"]
+            countries[row["country_code"].lower()] = row["country_code"]
+    for alias, code in COUNTRY_ALIASES.items():
+        countries[alias] = code
+    return cities, countries
+
+
+@lru_cache(maxsize=4096)
+def geocode(location):
+    """(latitude, longitude) of a free-text location, or None if unknown."""
+    if not location:
+        return None
+    cities, countries = gazetteer()
+    parts = [normalize(part) for part in re.split(r"[,;/|()]", location)]
+    parts = [part for part in parts if part]
+    codes = {countries[part] for part in parts if part in countries}
+    for part in [normalize(location), *parts]:
+        candidates = cities.get(part)
+        if not candidates:
+            continue
+        for code, latitude, longitude in candidates:
+            if code in codes:
+                return latitude, longitude
+        if not codes:
+            return candidates[0][1:]
+    return None
+
+
+def coordinates(location):
+    """geocode() as a (latitude, longitude) pair, (None, None) if unknown."""
+    return geocode(location) or (None, None)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Q for rows within the box around the circle. Near the poles the box
+    spans every longitude; across the antimeridian it wraps around.
+    """
+    delta = radius_km / KM_PER_DEGREE
+    q = Q(latitude__gte=latitude - delta, latitude__lte=latitude + delta)
+    if abs(latitude) + delta >= 90:
+        return q
+    delta_lng = delta / math.cos(math.radians(latitude))
+    west, east = longitude - delta_lng, longitude + delta_lng
+    if delta_lng >= 180:
+        return q
+    if west < -180:
+        return q & (Q(longitude__gte=west + 360) | Q(longitude__lte=east))
+    if east > 180:
+        return q & (Q(longitude__gte=west) | Q(longitude__lte=east - 360))
+    return q & Q(longitude__gte=west, longitude__lte=east)
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from the point to each row's coordinates, in km."""
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    row_lat = Radians(F("latitude"))
+    half_dlat = Sin((row_lat - Value(lat)) / 2)
+    half_dlng = Sin((Radians(F("longitude")) - Value(lng)) / 2)
+    haversine = Power(half_dlat, 2) + Value(math.cos(lat)) * Cos(row_lat) * Power(
+        half_dlng, 2
+    )
+    # Rounding can push antipodal points just past asin()'s domain.
+    return Value(2 * EARTH_RADIUS_KM) * ASin(
+        Least(Sqrt(haversine), Value(1.0)), output_field=FloatField()
+    )
+
+
+def within(queryset, latitude, longitude, radius_km):
+    """
+    Rows of `queryset` within `radius_km` of the point, annotated with their
+    `distance_km` and ordered nearest first.
+    """
+    return (
+        queryset.filter(bounding_box(latitude, longitude, radius_km))
+        .annotate(distance_km=distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by("distance_km", "pk")
+    )
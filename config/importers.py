@@ -0,0 +1,224 @@
+"""
+Streaming bulk job import from CSV or JSON Lines.
+
+Rows are read lazily and processed in fixed-size chunks, so memory use does
+not depend on the size of the file. Each chunk costs one company lookup, one
+lookup of existing jobs and one bulk INSERT and/or UPDATE; rows are upserted
+on (company, external_id). A chunk that collides with a concurrent import is
+retried, so the colliding rows become updates.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import bump_generations_on_commit
+from .documents import render_documents
+from .geo import COORDINATE_FIELDS, coordinates
+from .models import Company, CustomUser, Job
+from .salaries import to_usd, usd_rates
+from .search import update_search_documents
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = [CSV, JSONL]
+
+# Tries per chunk when a concurrent import inserts the same keys first.
+WRITE_ATTEMPTS = 3
+
+# Written on every upsert; fields missing from a row fall back to the model
+# defaults, so each row is treated as the full job record.
+UPSERT_FIELDS = [
+    "title",
+    "description",
+    "location",
+    "is_active",
+    "experience",
+    "min_experience_years",
+    "max_experience_years",
+    "mode",
+    "salary",
+    "salary_currency",
+    "category",
+]
+
+
+class JobImportRowSerializer(serializers.ModelSerializer):
+    external_id = serializers.CharField(max_length=100)
+    company_id = serializers.IntegerField()
+
+    class Meta:
+        model = Job
+        fields = ["external_id", "company_id", *UPSERT_FIELDS]
+        # Uniqueness is resolved per chunk by the importer, not per row.
+        validators = []
+
+
+def detect_format(filename, default=CSV):
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return JSONL
+    if name.endswith(".csv"):
+        return CSV
+    return default
+
+
+def iter_rows(stream, file_format):
+    """
+    Yields `(row_number, data)` pairs from a binary stream. `data` is a dict,
+    or an error message for lines that can't be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == CSV:
+        # Row 1 is the header.
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            # Empty cells mean "not provided" so model defaults apply.
+            yield number, {key: value for key, value in row.items() if value != ""}
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield number, f"Invalid JSON: {exc}"
+            continue
+        yield number, data if isinstance(data, dict) else "Expected a JSON object"
+
+
+class JobImporter:
+    def __init__(self, user, chunk_size=500, max_errors=1000):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.is_admin = user.is_superuser or user.role == CustomUser.ADMIN
+        self.report = {
+            "created": 0,
+            "updated": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+        }
+
+    def run(self, rows):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self._import_chunk(chunk)
+        self.report["errors"].sort(key=lambda error: error["row"])
+        return self.report
+
+    def _error(self, number, errors):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < self.max_errors:
+            self.report["errors"].append({"row": number, "errors": errors})
+        else:
+            self.report["errors_truncated"] = True
+
+    def _import_chunk(self, chunk):
+        valid = []
+        for number, data in chunk:
+            if isinstance(data, str):
+                self._error(number, {"non_field_errors": [data]})
+                continue
+            serializer = JobImportRowSerializer(data=data)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self._error(number, serializer.errors)
+
+        owners = dict(
+            Company.objects.filter(
+                id__in={data["company_id"] for _, data in valid}
+            ).values_list("id", "owner_id")
+        )
+        rows = {}
+        for number, data in valid:
+            company_id = data["company_id"]
+            if company_id not in owners:
+                self._error(number, {"company_id": ["Company does not exist."]})
+            elif not (self.is_admin or owners[company_id] == self.user.pk):
+                self._error(
+                    number,
+                    {
+                        "company_id": [
+                            "You must be the company owner or admin to create a job"
+                        ]
+                    },
+                )
+            else:
+                key = (company_id, data["external_id"])
+                if key in rows:
+                    self._error(
+                        rows[key][0],
+                        {"external_id": [f"Superseded by row {number}."]},
+                    )
+                rows[key] = (number, data)
+        if rows:
+            self._write(rows)
+
+    def _write(self, rows):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                return self._upsert(rows)
+            except IntegrityError as exc:
+                # Most likely a concurrent import inserted some of these keys
+                # after our lookup; looking them up again turns them into
+                # updates.
+                if attempt == WRITE_ATTEMPTS:
+                    for number, _ in rows.values():
+                        self._error(
+                            number, {"non_field_errors": [f"Could not save: {exc}"]}
+                        )
+
+    def _existing_jobs(self, rows):
+        return {
+            (company_id, external_id): job_id
+            for job_id, company_id, external_id in Job.objects.filter(
+                company_id__in={company_id for company_id, _ in rows},
+                external_id__in={external_id for _, external_id in rows},
+            ).values_list("id", "company_id", "external_id")
+        }
+
+    def _upsert(self, rows):
+        existing = self._existing_jobs(rows)
+        now = timezone.now()
+        rates = usd_rates()
+        to_create, to_update = [], []
+        for key, (_, data) in rows.items():
+            job = Job(**data)
+            # bulk_* skip the pre_save signals that derive these.
+            job.latitude, job.longitude = coordinates(job.location)
+            job.salary_usd = to_usd(job.salary, job.salary_currency, rates)
+            if key in existing:
+                job.pk = existing[key]
+                job.updated_at = now
+                to_update.append(job)
+            else:
+                job.posted_by = self.user
+                to_create.append(job)
+
+        with transaction.atomic():
+            created = Job.objects.bulk_create(to_create)
+            Job.objects.bulk_update(
+                to_update,
+                [*UPSERT_FIELDS, *COORDINATE_FIELDS, "salary_usd", "updated_at"],
+            )
+
+            # bulk_* bypass model signals; refresh derived data explicitly.
+            job_ids = [job.pk for job in created + to_update]
+            update_search_documents(job_ids)
+            render_documents(job_ids)
+            scopes = {"jobs"}
+            for company_id, _ in rows:
+                scopes.add(f"company:{company_id}")
+            scopes.update(f"job:{job_id}" for job_id in job_ids)
+            bump_generations_on_commit(scopes)
+
+        self.report["created"] += len(created)
+        self.report["updated"] += len(to_update)
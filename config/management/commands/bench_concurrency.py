@@ -0,0 +1,186 @@
+import http.client
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.models import Job
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    parts = urlsplit(url)
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server for {url} exited with {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(parts.netloc, timeout=1)
+            connection.request("GET", parts.path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server for {url} did not start within {timeout}s")
+
+
+def measure(url, concurrency, total, bust_cache):
+    """
+    Sends `total` GET requests to `url` from `concurrency` keep-alive clients.
+    Returns (throughput, latencies in seconds, errors).
+    """
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    separator = "&" if parts.query else "?"
+    counter = itertools.count()
+    lock = threading.Lock()
+    local = threading.local()
+
+    def request(_):
+        with lock:
+            number = next(counter)
+        target = f"{path}{separator}_bench={number}" if bust_cache else path
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+        started = time.perf_counter()
+        try:
+            local.connection.request("GET", target)
+            response = local.connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            del local.connection
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, ok in results if ok]
+    return len(latencies) / elapsed, latencies, total - len(latencies)
+
+
+def _percentile(latencies, percent):
+    if len(latencies) < 2:
+        return latencies[0] if latencies else float("nan")
+    return statistics.quantiles(latencies, n=100)[percent - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency and throughput of the WSGI job list against its async "
+        "(ASGI) counterpart at increasing concurrency. Starts gunicorn with sync "
+        "and uvicorn workers against the configured database unless URLs of "
+        "running deployments are given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", help="e.g. http://localhost:8000/api/jobs/")
+        parser.add_argument(
+            "--asgi-url", help="e.g. http://localhost:8001/api/async/jobs/"
+        )
+        parser.add_argument("--wsgi-path", default="/api/jobs/")
+        parser.add_argument("--asgi-path", default="/api/async/jobs/")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Worker processes per started server.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 4, 16, 64]
+        )
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Add a unique query parameter to bypass the response cache.",
+        )
+
+    def handle(self, *args, **options):
+        processes = []
+        try:
+            targets = {
+                "wsgi": options["wsgi_url"]
+                or self._start(
+                    processes,
+                    ["jobs_board.wsgi:application"],
+                    options["wsgi_path"],
+                    options["workers"],
+                ),
+                "asgi": options["asgi_url"]
+                or self._start(
+                    processes,
+                    [
+                        "jobs_board.asgi:application",
+                        "--worker-class",
+                        "uvicorn_worker.UvicornWorker",
+                    ],
+                    options["asgi_path"],
+                    options["workers"],
+                ),
+            }
+            if processes and not Job.objects.exists():
+                self.stderr.write("Warning: there are no jobs in the database.")
+            self._run(targets, options)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    def _start(self, processes, arguments, path, workers):
+        port = _free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                *arguments,
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            env=os.environ.copy(),
+        )
+        processes.append(process)
+        url = f"http://127.0.0.1:{port}{path}"
+        _wait_until_up(url, process)
+        return url
+
+    def _run(self, targets, options):
+        header = (
+            f"{'server':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+        )
+        self.stdout.write(header)
+        for concurrency in options["concurrency"]:
+            for name, url in targets.items():
+                # Warm up connections, caches and lazily imported code.
+                measure(url, concurrency, concurrency, options["no_cache"])
+                throughput, latencies, errors = measure(
+                    url, concurrency, options["requests"], options["no_cache"]
+                )
+                self.stdout.write(
+                    f"{name:<6} {concurrency:>5} {throughput:>9.1f} "
+                    f"{_percentile(latencies, 50) * 1000:>9.1f} "
+                    f"{_percentile(latencies, 95) * 1000:>9.1f} "
+                    f"{_percentile(latencies, 99) * 1000:>9.1f} {errors:>7}"
+                )
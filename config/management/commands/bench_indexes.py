@@ -0,0 +1,148 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from config.benchmarks import rolled_back, seed_dataset
+from config.geo import geocode, within
+from config.models import Company, Favorite, Job, JobApplication
+
+
+def access_patterns(dataset):
+    company_id = dataset["companies"][0]
+    job_id = dataset["jobs"][0]
+    user_id = dataset["users"][0]
+    latitude, longitude = geocode("Nairobi")
+    # (description, queryset, index expected in the plan)
+    return [
+        (
+            "all jobs, newest first",
+            Job.objects.order_by("-created_at", "-id")[:10],
+            "job_created_idx",
+        ),
+        (
+            "active jobs, newest first",
+            Job.objects.filter(is_active=True).order_by("-created_at", "-id")[:10],
+            "job_active_created_idx",
+        ),
+        (
+            "category filter",
+            Job.objects.filter(category="finance", is_active=True).order_by(
+                "-created_at"
+            )[:10],
+            "job_category_active_idx",
+        ),
+        (
+            "location filter",
+            Job.objects.filter(location="Kigali", is_active=True).order_by(
+                "-created_at"
+            )[:10],
+            "job_location_active_idx",
+        ),
+        (
+            "salary range in a currency",
+            Job.objects.filter(
+                salary_currency="USD", salary__gte=150000, salary__lte=152000
+            ),
+            "job_currency_salary_idx",
+        ),
+        (
+            "ordering=salary",
+            Job.objects.filter(salary__isnull=False).order_by("salary", "id")[:10],
+            "job_salary_idx",
+        ),
+        (
+            "salary range across currencies",
+            Job.objects.filter(salary_usd__gte=1000, salary_usd__lte=1010),
+            "job_salary_usd_idx",
+        ),
+        (
+            "ordering=salary with salary_in",
+            Job.objects.filter(salary_usd__isnull=False).order_by("salary_usd", "id")[
+                :10
+            ],
+            "job_salary_usd_idx",
+        ),
+        (
+            "ordering=-applications_count",
+            Job.objects.order_by("-applications_count", "-id")[:10],
+            "job_applications_count_idx",
+        ),
+        (
+            "ordering=-favorites_count",
+            Job.objects.order_by("-favorites_count", "-id")[:10],
+            "job_favorites_count_idx",
+        ),
+        (
+            "jobs near a point",
+            within(Job.objects.all(), latitude, longitude, 25)[:10],
+            "job_coordinates_idx",
+        ),
+        (
+            "companies near a point",
+            within(Company.objects.all(), latitude, longitude, 25)[:10],
+            "company_coordinates_idx",
+        ),
+        (
+            "ordering=title",
+            Job.objects.order_by("title", "id")[:10],
+            "job_title_idx",
+        ),
+        (
+            "experience-year range",
+            Job.objects.filter(min_experience_years=8, max_experience_years__lte=9),
+            "job_experience_years_idx",
+        ),
+        (
+            "company page",
+            Job.objects.filter(company_id=company_id).order_by("-created_at")[:10],
+            "job_company_created_idx",
+        ),
+        (
+            "applications for a job by status",
+            JobApplication.objects.filter(job_id=job_id, status="review").order_by(
+                "-created_at"
+            ),
+            "application_job_status_idx",
+        ),
+        (
+            "favorites of a user",
+            Favorite.objects.filter(user_id=user_id).order_by("-created_at")[:10],
+            "favorite_user_created_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset, EXPLAIN every JobFilter / ordering access "
+        "pattern and check that the intended index is used. Nothing is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--companies", type=int, default=200)
+        parser.add_argument(
+            "--verbose-plans", action="store_true", help="Print every full plan."
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        with rolled_back():
+            dataset = seed_dataset(
+                jobs=options["jobs"],
+                users=options["users"],
+                companies=options["companies"],
+            )
+            for description, queryset, index in access_patterns(dataset):
+                plan = queryset.explain()
+                used = index in plan
+                status = (
+                    self.style.SUCCESS("ok  ") if used else self.style.ERROR("MISS")
+                )
+                self.stdout.write(f"{status} {description:<36} {index}")
+                if options["verbose_plans"] or not used:
+                    self.stdout.write("       " + plan.replace("\n", "\n       "))
+                if not used:
+                    failures.append(index)
+
+        if failures:
+            raise CommandError(f"Indexes not used: {', '.join(failures)}")
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from config.benchmarks import rolled_back, seed_dataset
+from config.models import Job
+from config.renderers import ORJSONRenderer
+from config.representations import job_rows, render_job
+from config.serializers import JobSerializer
+
+
+def render_with_serializer(limit):
+    queryset = Job.objects.select_related("company", "posted_by")[:limit]
+    return JSONRenderer().render(JobSerializer(queryset, many=True).data)
+
+
+def render_with_fast_path(limit):
+    queryset = job_rows(Job.objects.all())[:limit]
+    return ORJSONRenderer().render([render_job(row) for row in queryset])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare jobs rendered per second by JobSerializer + JSONRenderer and by "
+        "the .values() fast path + ORJSONRenderer, and check both produce the "
+        "same bytes. Runs against a throwaway seeded dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=5000)
+        parser.add_argument("--page-size", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        with rolled_back():
+            seed_dataset(jobs=options["jobs"], users=max(options["jobs"] // 10, 1))
+            expected = render_with_serializer(page_size)
+            if render_with_fast_path(page_size) != expected:
+                raise CommandError("Fast path output differs from JobSerializer")
+
+            results = {}
+            for name, render in (
+                ("JobSerializer", render_with_serializer),
+                ("fast path", render_with_fast_path),
+            ):
+                best = min(
+                    self._time(render, page_size) for _ in range(options["repeat"])
+                )
+                results[name] = page_size / best
+                self.stdout.write(f"{name:<14} {results[name]:>10,.0f} jobs/s")
+
+        speedup = results["fast path"] / results["JobSerializer"]
+        self.stdout.write(
+            self.style.SUCCESS(f"Identical output, {speedup:.1f}x faster.")
+        )
+
+    def _time(self, render, page_size):
+        started = time.perf_counter()
+        render(page_size)
+        return time.perf_counter() - started
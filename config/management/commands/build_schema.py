@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from config.schema import (
+    code_version,
+    generate_schema,
+    read_schema,
+    schema_path,
+    write_schema,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema served at /api/schema/ for the current "
+        "code version, unless it already exists."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Regenerate an existing schema."
+        )
+
+    def handle(self, *args, **options):
+        version = code_version()
+        if not options["force"] and read_schema(version) is not None:
+            self.stdout.write(f"Schema {version} is up to date.")
+            return
+        documents = generate_schema()
+        write_schema(version, documents)
+        for schema_format in documents:
+            self.stdout.write(f"Wrote {schema_path(version, schema_format)}")
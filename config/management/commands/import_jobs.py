@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.importers import FORMATS, JobImporter, detect_format, iter_rows
+from config.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert jobs from a CSV or JSON Lines file (or '-' for stdin), keyed on "
+        "(company_id, external_id), on behalf of a user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--user", required=True, help="Email of the user posting the jobs."
+        )
+        parser.add_argument("--format", choices=FORMATS, dest="file_format")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options["user"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        path = options["path"]
+        file_format = options["file_format"] or detect_format(path)
+        importer = JobImporter(user, chunk_size=options["chunk_size"])
+        if path == "-":
+            report = importer.run(iter_rows(sys.stdin.buffer, file_format))
+        else:
+            with open(path, "rb") as stream:
+                report = importer.run(iter_rows(stream, file_format))
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if report["errors_truncated"]:
+            self.stderr.write("(further errors omitted)")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['created']} created, {report['updated']} updated, "
+                f"{report['failed']} failed."
+            )
+        )
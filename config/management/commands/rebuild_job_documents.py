@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from config.documents import DOCUMENT_VERSION, render_documents
+from config.models import Job, JobDocument
+
+
+def _render_batch(job_ids):
+    try:
+        return len(render_documents(job_ids))
+    finally:
+        # Each worker thread opens its own connection; don't leak it.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Re-render the pre-rendered document of every job in parallel batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--outdated",
+            action="store_true",
+            help="Only render jobs whose document is missing or outdated.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        if connection.vendor == "sqlite" and workers > 1:
+            # SQLite allows a single writer; parallel batches would only
+            # contend for the database lock.
+            self.stdout.write("SQLite detected, rendering with a single worker.")
+            workers = 1
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batches = self._batches(batch_size, options["outdated"])
+            for rendered in executor.map(_render_batch, batches):
+                total += rendered
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} job documents."))
+
+    def _batches(self, batch_size, outdated):
+        jobs = Job.objects.all()
+        if outdated:
+            jobs = jobs.exclude(
+                pk__in=JobDocument.objects.filter(version=DOCUMENT_VERSION).values(
+                    "job_id"
+                )
+            )
+        ids = jobs.order_by("id").values_list("id", flat=True)
+        last_id = 0
+        while True:
+            batch = list(ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            last_id = batch[-1]
+            yield batch
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from config.models import Job
+from config.search import search_backend, update_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search document of every job."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "No full-text engine on this database; search falls back "
+                    "to icontains."
+                )
+            )
+            return
+
+        batch_size = options["batch_size"]
+        ids = Job.objects.order_by("id").values_list("id", flat=True)
+        total, last_id = 0, 0
+        while True:
+            batch = list(ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            update_search_documents(batch)
+            total += len(batch)
+            last_id = batch[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {total} search documents ({backend}).")
+        )
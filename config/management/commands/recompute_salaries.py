@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from config.models import Currency
+from config.salaries import recompute
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute jobs' USD-normalized salaries from the current exchange "
+        "rates, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--currency",
+            action="append",
+            choices=Currency.values,
+            help="Only recompute this currency (repeatable). Default: all.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for currency in options["currency"] or Currency.values:
+            updated = recompute(currency, batch_size=options["batch_size"])
+            self.stdout.write(f"{currency}: {updated} jobs")
+        self.stdout.write(self.style.SUCCESS("Salaries recomputed."))
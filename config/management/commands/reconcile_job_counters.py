@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from config.counters import reconcile
+from config.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every job's application and favorite counters in batches "
+        "and repair the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        checked = repaired = 0
+        for batch in self._batches(options["batch_size"]):
+            repaired += reconcile(batch)
+            checked += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} jobs, repaired {repaired}.")
+        )
+
+    def _batches(self, batch_size):
+        ids = Job.objects.order_by("id").values_list("id", flat=True)
+        last_id = 0
+        while True:
+            batch = list(ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            last_id = batch[-1]
+            yield batch
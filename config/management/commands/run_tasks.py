@@ -0,0 +1,67 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from config import tasks  # noqa: F401 - registers the task functions
+from config.taskqueue import claim_tasks, run_task
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks until stopped (or once with --once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when no task is due.",
+        )
+        parser.add_argument(
+            "--visibility-timeout",
+            type=int,
+            default=settings.TASKS_VISIBILITY_TIMEOUT,
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no task is due."
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        # Finish the current batch on SIGTERM/SIGINT instead of abandoning it
+        # until its visibility timeout expires.
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f"Worker {worker} started.")
+        succeeded = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            claimed = claim_tasks(
+                worker, options["batch_size"], options["visibility_timeout"]
+            )
+            if not claimed:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+            for task in claimed:
+                if run_task(task):
+                    succeeded += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Worker {worker} stopped: {succeeded} ok, {failed} failed."
+            )
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
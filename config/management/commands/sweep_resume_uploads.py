@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from config.uploads import sweep_unclaimed_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete directly uploaded resumes that were never attached to an "
+        "application and can no longer be. Run it periodically, e.g. hourly."
+    )
+
+    def handle(self, *args, **options):
+        deleted = sweep_unclaimed_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unclaimed uploads."))
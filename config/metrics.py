@@ -0,0 +1,219 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Under gunicorn every worker is a separate process, so metrics are kept in
+prometheus_client's multiprocess mode whenever PROMETHEUS_MULTIPROC_DIR is
+set: each process writes its samples to memory-mapped files in that
+directory and /metrics merges them. The directory must exist before this
+module is imported; entrypoint.sh creates it, and gunicorn.conf.py clears it
+on start and marks exited workers dead.
+
+Connection pool stats are sampled when /metrics is scraped rather than per
+request. A scrape only reaches one worker, though, so in multiprocess mode
+every process also refreshes its own pool metrics from the middleware at most
+once per POOL_SAMPLE_INTERVAL seconds.
+"""
+
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .dbpool import pool_stats
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Seconds between pool samples taken by each process in multiprocess mode.
+POOL_SAMPLE_INTERVAL = 15
+
+REQUEST_LATENCY = Histogram(
+    "jobs_board_http_request_duration_seconds",
+    "Time spent handling a request, per view and action.",
+    ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSE_SIZE = Histogram(
+    "jobs_board_http_response_size_bytes",
+    "Size of non-streaming response bodies, per view and action.",
+    ["view"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+DB_QUERIES = Histogram(
+    "jobs_board_http_request_db_queries",
+    "Database queries run while handling a request, per view and action.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+IN_FLIGHT = Gauge(
+    "jobs_board_http_requests_in_flight",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "jobs_board_response_cache_requests",
+    "Response cache lookups by result (hit or miss).",
+    ["result"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "jobs_board_db_pool_connections",
+    "Pooled database connections by state (size, available, waiting).",
+    ["database", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Counter(
+    "jobs_board_db_pool_wait_seconds",
+    "Time requests spent waiting for a pooled database connection.",
+    ["database"],
+)
+DB_POOL_ERRORS = Counter(
+    "jobs_board_db_pool_errors",
+    "Pool timeouts (request) and failed connection attempts (connection).",
+    ["database", "kind"],
+)
+
+# psycopg_pool get_stats() keys: gauges by state, then counters as
+# (counter, extra labels, key, divisor).
+POOL_GAUGES = [
+    ("size", "pool_size"),
+    ("available", "pool_available"),
+    ("waiting", "requests_waiting"),
+]
+POOL_COUNTERS = [
+    (DB_POOL_WAIT, (), "requests_wait_ms", 1000),
+    (DB_POOL_ERRORS, ("request",), "requests_errors", 1),
+    (DB_POOL_ERRORS, ("connection",), "connections_errors", 1),
+]
+
+
+def view_name(request):
+    """`ViewSet.action` for DRF viewsets, the view's name otherwise."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    func = match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if view_class is None:
+        return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+    actions = getattr(func, "actions", None) or {}
+    method = request.method.lower()
+    action = actions.get(method) or (actions.get("get") if method == "head" else None)
+    return f"{view_class.__name__}.{action}" if action else view_class.__name__
+
+
+class PoolObserver:
+    """Copies pool stats into the metrics; counters advance by their deltas."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._next_sample = 0.0
+
+    def sample_if_due(self):
+        now = time.monotonic()
+        if now < self._next_sample:
+            return
+        self._next_sample = now + self.interval
+        self()
+
+    def __call__(self):
+        for alias, stats in pool_stats().items():
+            for state, key in POOL_GAUGES:
+                DB_POOL_CONNECTIONS.labels(alias, state).set(stats.get(key, 0))
+            with self._lock:
+                for counter, labels, key, divisor in POOL_COUNTERS:
+                    value = stats.get(key, 0)
+                    delta = value - self._seen.get((alias, key), 0)
+                    self._seen[(alias, key)] = value
+                    if delta > 0:
+                        counter.labels(alias, *labels).inc(delta / divisor)
+
+
+observe_pools = PoolObserver(POOL_SAMPLE_INTERVAL)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with IN_FLIGHT.track_inprogress(), self.count_queries(counter):
+            response = self.get_response(request)
+        self.observe(request, response, counter, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with IN_FLIGHT.track_inprogress(), self.count_queries(counter):
+            response = await self.get_response(request)
+        self.observe(request, response, counter, time.perf_counter() - started)
+        return response
+
+    def count_queries(self, counter):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def observe(self, request, response, counter, elapsed):
+        view = view_name(request)
+        REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(
+            elapsed
+        )
+        DB_QUERIES.labels(view).observe(counter.count)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        if MULTIPROC_DIR:
+            observe_pools.sample_if_due()
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+
+    observe_pools()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,160 @@
+"""
+Per-request SQL instrumentation.
+
+`SQLInstrumentationMiddleware` wraps every database connection with
+`execute_wrapper` for a sample of requests and records the query count,
+total DB time, repeated statements (a telltale of N+1 queries) and the
+slowest statement. The numbers go out as a JSON log line and, for staff
+users or with `SQL_SERVER_TIMING` set, a `Server-Timing` header; requests
+slower than `SQL_SLOW_REQUEST_MS` also log their full SQL trace. Statements
+are logged without their parameters.
+
+Streaming responses are reported once the view returns, so queries run
+while their content is consumed (e.g. by exports) are not counted.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("config.sql")
+
+# Longest SQL trace kept per request; later statements are only counted.
+MAX_TRACE_LENGTH = 1000
+# Repeated statements reported per request.
+MAX_DUPLICATES = 5
+
+IN_LIST = re.compile(r"\((?:%s, )+%s\)")
+
+
+def fingerprint(sql):
+    """The statement with IN lists collapsed, so `id IN (...)` of any size match."""
+    return IN_LIST.sub("(...)", sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, None)
+        self.fingerprints = Counter()
+        self.trace = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest[0]:
+                self.slowest = (duration, sql)
+            self.fingerprints[fingerprint(sql)] += 1
+            if len(self.trace) < MAX_TRACE_LENGTH:
+                alias = context["connection"].alias
+                self.trace.append((alias, round(duration * 1000, 2), sql))
+
+    def duplicates(self):
+        return [
+            (count, sql)
+            for sql, count in self.fingerprints.most_common(MAX_DUPLICATES)
+            if count > 1
+        ]
+
+
+class SQLInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.wrap_connections(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        if self.shows_timing(request):
+            self.add_server_timing(response, recorder, elapsed)
+        self.report(request, response, recorder, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.wrap_connections(recorder):
+            response = await self.get_response(request)
+        elapsed = time.perf_counter() - started
+        # Resolving a session user may query the database.
+        if await sync_to_async(self.shows_timing)(request):
+            self.add_server_timing(response, recorder, elapsed)
+        self.report(request, response, recorder, elapsed)
+        return response
+
+    def is_sampled(self):
+        rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def wrap_connections(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def shows_timing(self, request):
+        if settings.SQL_SERVER_TIMING:
+            return True
+        # DRF views store the user they authenticated on the request.
+        user = getattr(request, "user", None)
+        return user is not None and user.is_staff
+
+    def add_server_timing(self, response, recorder, elapsed):
+        repeated = sum(count - 1 for count, _ in recorder.duplicates())
+        response["Server-Timing"] = (
+            f"db;dur={recorder.duration * 1000:.2f};"
+            f'desc="{recorder.count} queries, {repeated} repeated", '
+            f"total;dur={elapsed * 1000:.2f}"
+        )
+
+    def report(self, request, response, recorder, elapsed):
+        db_ms = recorder.duration * 1000
+        total_ms = elapsed * 1000
+        duplicates = recorder.duplicates()
+        slowest_duration, slowest_sql = recorder.slowest
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(total_ms, 2),
+            "duplicates": [{"count": count, "sql": sql} for count, sql in duplicates],
+            "slowest_ms": round(slowest_duration * 1000, 2),
+            "slowest_sql": slowest_sql,
+        }
+        if total_ms >= settings.SQL_SLOW_REQUEST_MS:
+            fields["trace"] = [
+                {"db": alias, "ms": ms, "sql": sql} for alias, ms, sql in recorder.trace
+            ]
+            logger.warning("slow_request %s", json.dumps(fields))
+        else:
+            logger.info("request_sql %s", json.dumps(fields))
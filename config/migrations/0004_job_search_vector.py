@@ -0,0 +1,75 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = "config_job_fts"
+GIN_INDEX = "config_job_search_vector_gin"
+
+
+def create_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "UPDATE config_job j SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(j.title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(j.category, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(c.name, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(j.location, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(j.description, '')), 'D') "
+            "FROM config_company c WHERE c.id = j.company_id"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, category, company_name, location, description, "
+            "tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, title, category, company_name, location, description) "
+            "SELECT j.id, j.title, COALESCE(j.category, ''), c.name, j.location, "
+            "j.description FROM config_job j "
+            "INNER JOIN config_company c ON c.id = j.company_id"
+        )
+
+
+def drop_search_backend(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def create_gin_index(apps, schema_editor):
+    # Outside a transaction, so config_job stays writable while it builds.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY {GIN_INDEX} "
+            "ON config_job USING gin (search_vector)"
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {GIN_INDEX}")
+
+
+class Migration(migrations.Migration):
+    # The GIN index is built concurrently; see create_gin_index().
+    atomic = False
+
+    dependencies = [
+        (
+            "config",
+            "0003_job_category_job_experience_job_max_experience_years_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend, atomic=True),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
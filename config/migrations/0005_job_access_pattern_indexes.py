@@ -0,0 +1,94 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from config.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so config_job stays writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ("config", "0004_job_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="favorite",
+            index=models.Index(
+                fields=["user", "-created_at"], name="favorite_user_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(fields=["-created_at", "-id"], name="job_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at", "-id"],
+                name="job_active_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["category", "is_active", "-created_at"],
+                name="job_category_active_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["location", "is_active", "-created_at"],
+                name="job_location_active_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["salary_currency", "salary"], name="job_currency_salary_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(fields=["salary", "id"], name="job_salary_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(fields=["title", "id"], name="job_title_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["min_experience_years", "max_experience_years"],
+                name="job_experience_years_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["company", "-created_at"], name="job_company_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["job", "status", "-created_at"],
+                name="application_job_status_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="company",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to="config.company",
+            ),
+        ),
+    ]
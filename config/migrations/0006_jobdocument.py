@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0005_job_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobDocument",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="document",
+                        serialize=False,
+                        to="config.job",
+                    ),
+                ),
+                ("version", models.PositiveSmallIntegerField()),
+                ("body", models.TextField()),
+                ("rendered_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
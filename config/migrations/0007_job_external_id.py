@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0006_jobdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="external_id",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="job",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("external_id__isnull", False)),
+                fields=("company", "external_id"),
+                name="job_company_external_id_uniq",
+            ),
+        ),
+    ]
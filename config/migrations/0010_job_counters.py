@@ -0,0 +1,95 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from config.operations import AddIndexConcurrently
+
+STATUSES = ["applied", "review", "interview", "rejected", "hired"]
+
+
+def backfill_counters(apps, schema_editor):
+    Job = apps.get_model("config", "Job")
+    JobApplication = apps.get_model("config", "JobApplication")
+    Favorite = apps.get_model("config", "Favorite")
+
+    def count(model, **filters):
+        counts = (
+            model.objects.filter(job=OuterRef("pk"), **filters)
+            .order_by()
+            .values("job")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    Job.objects.update(
+        applications_count=count(JobApplication),
+        favorites_count=count(Favorite),
+        **{
+            f"{status}_count": count(JobApplication, status=status)
+            for status in STATUSES
+        },
+    )
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, after the backfill, so config_job stays
+    # writable meanwhile; the backfill itself still runs in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("config", "0009_token_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="applications_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="applied_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="favorites_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="hired_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="interview_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="rejected_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop, atomic=True),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["-applications_count", "-id"], name="job_applications_count_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                fields=["-favorites_count", "-id"], name="job_favorites_count_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+from config.geo import geocode
+from config.operations import AddIndexConcurrently
+
+
+def geocode_jobs(apps, schema_editor):
+    Job = apps.get_model("config", "Job")
+    # One UPDATE per distinct known location.
+    locations = Job.objects.order_by().values_list("location", flat=True).distinct()
+    for location in locations:
+        point = geocode(location)
+        if point is not None:
+            Job.objects.filter(location=location).update(
+                latitude=point[0], longitude=point[1]
+            )
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, after the backfill, so config_job stays
+    # writable meanwhile; the backfill itself still runs in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("config", "0010_job_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="latitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="location",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="longitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="latitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="longitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunPython(geocode_jobs, migrations.RunPython.noop, atomic=True),
+        AddIndexConcurrently(
+            model_name="company",
+            index=models.Index(
+                condition=models.Q(("latitude__isnull", False)),
+                fields=["latitude", "longitude"],
+                name="company_coordinates_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("latitude__isnull", False)),
+                fields=["latitude", "longitude"],
+                name="job_coordinates_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, IntegerField, Value
+from django.db.models.functions import Cast, Round
+
+from config.operations import AddIndexConcurrently
+
+# Starting rates (USD per unit); keep them current through the admin.
+INITIAL_RATES = {
+    "USD": Decimal("1"),
+    "KES": Decimal("0.0077"),
+    "NGN": Decimal("0.00065"),
+}
+
+
+def seed_rates_and_salaries(apps, schema_editor):
+    ExchangeRate = apps.get_model("config", "ExchangeRate")
+    Job = apps.get_model("config", "Job")
+    for currency, rate in INITIAL_RATES.items():
+        ExchangeRate.objects.update_or_create(
+            currency=currency, defaults={"usd_rate": rate}
+        )
+        Job.objects.filter(salary_currency=currency).update(
+            salary_usd=Cast(
+                Round(F("salary") * Value(rate, output_field=DecimalField())),
+                IntegerField(),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, after the backfill, so config_job stays
+    # writable meanwhile; the backfill itself still runs in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("config", "0011_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExchangeRate",
+            fields=[
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("USD", "USD"), ("KES", "KES"), ("NGN", "NGN")],
+                        max_length=10,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("usd_rate", models.DecimalField(decimal_places=10, max_digits=20)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="salary_usd",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            seed_rates_and_salaries, migrations.RunPython.noop, atomic=True
+        ),
+        AddIndexConcurrently(
+            model_name="job",
+            index=models.Index(fields=["salary_usd", "id"], name="job_salary_usd_idx"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+from config.operations import AddUniqueConstraintConcurrently
+
+
+class Migration(migrations.Migration):
+    # The unique index is built concurrently so config_jobapplication stays
+    # writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ("config", "0012_salary_usd"),
+    ]
+
+    operations = [
+        AddUniqueConstraintConcurrently(
+            model_name="jobapplication",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("resume__isnull", False), models.Q(("resume", ""), _negated=True)
+                ),
+                fields=("resume",),
+                name="application_resume_unique",
+            ),
+        ),
+    ]
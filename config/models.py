@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 phone_regex = r"^\+?1?\d{9,15}$"
 phone_validator = RegexValidator(
@@ -27,14 +29,58 @@ class CustomUser(AbstractUser):
     ]
 
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=USER)
+    # Embedded in issued JWTs; bumping it revokes every outstanding token.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    # Changing any of these bumps token_version (see config.signals).
+    TOKEN_REVOKING_FIELDS = ("password", "role", "is_superuser", "is_active")
+
     def __str__(self):
         return self.email
 
 
-class Company(models.Model):
+class TokenUser(CustomUser):
+    """
+    A CustomUser built from JWT claims without a query (see
+    config.authentication). Fields missing from the token are deferred;
+    touching any of them loads all of them in one query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using, fields, from_queryset)
+
+
+class DerivedFieldsModel(models.Model):
+    """
+    Base for models whose pre_save signals compute some fields from others
+    (see config.signals). `derived_fields` maps each source field to the
+    fields computed from it; a save with `update_fields` that include a source
+    field saves its derived fields too.
+    """
+
+    derived_fields = {}
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for source, derived in self.derived_fields.items():
+                if source in update_fields:
+                    update_fields.update(derived)
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class Company(DerivedFieldsModel):
     name = models.CharField(max_length=100)
     description = models.TextField()
     website = models.URLField(blank=True, null=True)
@@ -43,9 +89,24 @@ class Company(models.Model):
         on_delete=models.CASCADE,
         related_name="companies",
     )
+    location = models.CharField(max_length=100, blank=True, null=True)
+    # Geocoded from `location` by config.geo; null when it isn't a known city.
+    latitude = models.FloatField(null=True, editable=False)
+    longitude = models.FloatField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    derived_fields = {"location": ["latitude", "longitude"]}
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["latitude", "longitude"],
+                name="company_coordinates_idx",
+                condition=models.Q(latitude__isnull=False),
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -73,15 +134,20 @@ class Currency(models.TextChoices):
     NGN = "NGN", "NGN"
 
 
-class Job(models.Model):
+class Job(DerivedFieldsModel):
     title = models.CharField(max_length=200)
     description = models.TextField()
     company = models.ForeignKey(
         Company,
         on_delete=models.CASCADE,
         related_name="jobs",
+        # Covered by job_company_created_idx.
+        db_index=False,
     )
     location = models.CharField(max_length=100)
+    # Geocoded from `location` by config.geo; null when it isn't a known city.
+    latitude = models.FloatField(null=True, editable=False)
+    longitude = models.FloatField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     posted_by = models.ForeignKey(
@@ -109,15 +175,125 @@ class Job(models.Model):
         blank=True,
         null=True,
     )
+    # `salary` converted to USD with the ExchangeRate table, maintained by
+    # config.salaries. Null without a salary or currency.
+    salary_usd = models.PositiveIntegerField(null=True, editable=False)
     category = models.CharField(max_length=200, blank=True, null=True)
+    # Partner feed identifier; bulk imports upsert on (company, external_id).
+    external_id = models.CharField(max_length=100, blank=True, null=True)
+    # Weighted full-text document, maintained by config.search. Only used on
+    # Postgres; SQLite keeps its documents in the config_job_fts FTS5 table.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Popularity counters, maintained by config.counters.
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    # Applications per JobApplication status.
+    applied_count = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    interview_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_count = models.PositiveIntegerField(default=0, editable=False)
+    hired_count = models.PositiveIntegerField(default=0, editable=False)
+
+    derived_fields = {
+        "location": ["latitude", "longitude"],
+        "salary": ["salary_usd"],
+        "salary_currency": ["salary_usd"],
+    }
 
     class Meta:
         ordering = ["-created_at"]
+        # Each index backs a JobFilter / ordering access pattern; see
+        # `manage.py bench_indexes` for the query each one serves.
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="job_created_idx"),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="job_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["category", "is_active", "-created_at"],
+                name="job_category_active_idx",
+            ),
+            models.Index(
+                fields=["location", "is_active", "-created_at"],
+                name="job_location_active_idx",
+            ),
+            models.Index(
+                fields=["salary_currency", "salary"], name="job_currency_salary_idx"
+            ),
+            models.Index(fields=["salary", "id"], name="job_salary_idx"),
+            models.Index(fields=["salary_usd", "id"], name="job_salary_usd_idx"),
+            models.Index(fields=["title", "id"], name="job_title_idx"),
+            models.Index(
+                fields=["min_experience_years", "max_experience_years"],
+                name="job_experience_years_idx",
+            ),
+            models.Index(
+                fields=["company", "-created_at"], name="job_company_created_idx"
+            ),
+            models.Index(
+                fields=["-applications_count", "-id"],
+                name="job_applications_count_idx",
+            ),
+            models.Index(
+                fields=["-favorites_count", "-id"], name="job_favorites_count_idx"
+            ),
+            models.Index(
+                fields=["latitude", "longitude"],
+                name="job_coordinates_idx",
+                condition=models.Q(latitude__isnull=False),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "external_id"],
+                condition=models.Q(external_id__isnull=False),
+                name="job_company_external_id_uniq",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.company.name}"
 
 
+class ExchangeRate(models.Model):
+    """
+    USD value of one unit of each currency, used to normalize salaries.
+    Maintained locally (e.g. through the admin); changing a rate recomputes
+    the salaries in that currency in the background.
+    """
+
+    currency = models.CharField(
+        max_length=10, choices=Currency.choices, primary_key=True
+    )
+    usd_rate = models.DecimalField(max_digits=20, decimal_places=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"1 {self.currency} = {self.usd_rate} USD"
+
+
+class JobDocument(models.Model):
+    """
+    Pre-rendered JSON payload of a job, as served by the job list endpoint.
+    Kept as text rather than JSON so key order survives Postgres' jsonb.
+    """
+
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="document",
+    )
+    version = models.PositiveSmallIntegerField()
+    body = models.TextField()
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Document for job {self.job_id} (v{self.version})"
+
+
 class JobApplication(models.Model):
     STATUS_CHOICES = [
         ("applied", "Applied"),
@@ -147,6 +323,21 @@ class JobApplication(models.Model):
 
     class Meta:
         unique_together = ("job", "applicant")
+        indexes = [
+            models.Index(
+                fields=["job", "status", "-created_at"],
+                name="application_job_status_idx",
+            ),
+        ]
+        constraints = [
+            # A direct upload can only be claimed once; two applications
+            # sharing a file would delete it from under each other.
+            models.UniqueConstraint(
+                fields=["resume"],
+                condition=models.Q(resume__isnull=False) & ~models.Q(resume=""),
+                name="application_resume_unique",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.job.title} - {self.applicant.email}"
@@ -166,6 +357,50 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ("user", "job")
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="favorite_user_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.job.title}"
+
+
+class Task(models.Model):
+    """
+    A queued background task (see config.taskqueue). Rows are deleted once
+    the task succeeds; tasks that exhaust their attempts stay as failed.
+    """
+
+    QUEUED = "queued"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # Earliest time the task may (re)run. Claiming a task pushes this past
+    # the visibility timeout, so tasks of a crashed worker are picked up again.
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_at"],
+                condition=models.Q(status="queued"),
+                name="task_queued_run_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts})"
@@ -0,0 +1,73 @@
+"""
+Migration operations shared by config's migrations.
+"""
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently as PostgresAddIndexConcurrently,
+)
+from django.db.migrations.operations import AddConstraint, AddIndex
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """
+    Builds the index with CREATE INDEX CONCURRENTLY on Postgres, so writes to
+    the table aren't blocked while it builds, and with a plain AddIndex on
+    other databases (e.g. SQLite in development). Migrations using it must
+    set `atomic = False`.
+
+    A concurrent build that fails leaves an INVALID index behind; drop it
+    before running the migration again.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class AddUniqueConstraintConcurrently(AddConstraint):
+    """
+    Adds a conditional UniqueConstraint, which Postgres implements as a partial
+    unique index, with CREATE UNIQUE INDEX CONCURRENTLY. Other databases get a
+    plain AddConstraint. Migrations using it must set `atomic = False`.
+    """
+
+    atomic = False
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self._is_concurrent(schema_editor, model):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        sql = str(self.constraint.create_sql(model, schema_editor))
+        schema_editor.execute(
+            sql.replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1)
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self._is_concurrent(schema_editor, model):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        sql = str(self.constraint.remove_sql(model, schema_editor))
+        schema_editor.execute(sql.replace("DROP INDEX", "DROP INDEX CONCURRENTLY", 1))
+
+    def _is_concurrent(self, schema_editor, model):
+        return (
+            schema_editor.connection.vendor == "postgresql"
+            and self.constraint.condition is not None
+            and self.allow_migrate_model(schema_editor.connection.alias, model)
+        )
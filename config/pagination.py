@@ -0,0 +1,258 @@
+import base64
+import datetime
+import decimal
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; passing `?cursor=` (empty for the first
+    page) switches a request to keyset pagination instead.
+
+    The keyset is the queryset's ordering (whatever OrderingFilter applied,
+    else the model's Meta.ordering, else `default_ordering`) tie-broken on
+    `id`, so deep pages cost the same as the first one and no COUNT(*) is run.
+    Nullable ordering columns always sort their NULLs after every value.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = (
+        "Opaque keyset cursor. Send an empty value to start cursor pagination."
+    )
+    invalid_cursor_message = "Invalid cursor"
+    default_ordering = ("-created_at",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        page_queryset = self.get_cursor_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.finish_cursor_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of `paginate_queryset()`, using the async ORM."""
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            page_queryset = self.get_cursor_page_queryset(queryset, request, view)
+            if page_queryset is None:
+                return None
+            return self.finish_cursor_page([row async for row in page_queryset])
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator counts lazily through a cached property; fill it in ahead
+        # of time so it never runs a sync query.
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = [row async for row in self.page.object_list]
+        return list(self.page.object_list)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self._cursor_link(self._row_position(self.rows[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self._cursor_link(self._row_position(self.rows[0]), reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
+
+    # Keyset pagination is split in two steps so that callers which evaluate
+    # querysets themselves (e.g. async views) can share the logic.
+
+    def get_cursor_page_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.request = request
+        self.keys = self._get_keys(queryset)
+        self.position, self.reverse = self._decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+
+        queryset = queryset.order_by(*self._order_by())
+        if self.position is not None:
+            queryset = queryset.filter(self._after(self.position))
+        return queryset[: self.page_size + 1]
+
+    def finish_cursor_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        self.rows = rows
+        return rows
+
+    def _get_keys(self, queryset):
+        model = queryset.model
+        ordering = [
+            term
+            for term in (queryset.query.order_by or model._meta.ordering)
+            if isinstance(term, str) and term != "?"
+        ] or list(self.default_ordering)
+
+        keys = []
+        for term in ordering:
+            descending = term.startswith("-")
+            name = term.lstrip("-")
+            if name in ("pk", model._meta.pk.name):
+                name = model._meta.pk.attname
+            field = self._get_field(model, name)
+            if field is not None and field.many_to_one:
+                # Key on the raw id, which is JSON-serializable and indexed.
+                name = field.attname
+            keys.append((name, descending, field))
+            if name == model._meta.pk.attname:
+                return keys
+        pk = model._meta.pk
+        keys.append((pk.attname, keys[0][1], pk))
+        return keys
+
+    def _get_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations (e.g. a search rank) have no model field.
+            return None
+
+    def _order_by(self):
+        ordering = []
+        for name, descending, field in self.keys:
+            if self.reverse:
+                descending = not descending
+            if field is not None and field.null:
+                nulls = {"nulls_first": True} if self.reverse else {"nulls_last": True}
+                expression = F(name)
+                ordering.append(
+                    expression.desc(**nulls) if descending else expression.asc(**nulls)
+                )
+            else:
+                ordering.append(f"-{name}" if descending else name)
+        return ordering
+
+    def _after(self, position):
+        """
+        Builds `(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...` for the current
+        scan direction, treating NULL as greater than any value.
+        """
+        nulls_last = not self.reverse
+        clauses = []
+        equal = Q()
+        for (name, descending, field), value in zip(self.keys, position):
+            if self.reverse:
+                descending = not descending
+            nullable = field is not None and field.null
+            if value is None:
+                after = None if nulls_last else Q(**{f"{name}__isnull": False})
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending else "gt"
+                after = Q(**{f"{name}__{lookup}": value})
+                if nullable and nulls_last:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if after is not None:
+                clauses.append(equal & after)
+            equal &= same
+        return reduce(or_, clauses) if clauses else Q(pk__in=[])
+
+    def _row_position(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name, _, _ in self.keys]
+        return [getattr(row, name) for name, _, _ in self.keys]
+
+    def _key_names(self):
+        return [("-" if descending else "") + name for name, descending, _ in self.keys]
+
+    def _cursor_link(self, position, reverse):
+        payload = {
+            "o": self._key_names(),
+            "p": [_json_value(value) for value in position],
+            "r": int(reverse),
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def _decode_cursor(self, token):
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if payload["o"] != self._key_names():
+                raise ValueError("cursor ordering does not match")
+            position = [
+                value if field is None or value is None else field.to_python(value)
+                for value, (_, _, field) in zip(payload["p"], self.keys, strict=True)
+            ]
+            return position, bool(payload["r"])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
@@ -23,9 +23,10 @@ class IsCompanyOwnerOrAdmin(BasePermission):
             return True
         if getattr(user, "role", None) == "admin":
             return True
-        if hasattr(obj, "owner") and obj.owner == user:
+        # Compare ids so the owner rows are never loaded.
+        if hasattr(obj, "owner_id") and obj.owner_id == user.pk:
             return True
-        if hasattr(obj, "company") and getattr(obj, "company").owner == user:
+        if hasattr(obj, "company") and obj.company.owner_id == user.pk:
             return True
         return False
 
@@ -39,13 +40,13 @@ class IsApplicantOrCompanyAdmin(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        if obj.applicant == user:
+        if obj.applicant_id == user.pk:
             return True
         if getattr(user, "is_superuser", False):
             return True
         if getattr(user, "role", None) == "admin":
             return True
         # if user is company owner for the job
-        if hasattr(obj.job, "company") and obj.job.company.owner == user:
+        if hasattr(obj.job, "company") and obj.job.company.owner_id == user.pk:
             return True
         return False
@@ -0,0 +1,225 @@
+"""
+Read-replica routing.
+
+Replicas are extra `DATABASES` aliases built from `DATABASE_REPLICA_URLS`.
+Nothing reads from them unless a request opts in: views wrap safe-method
+requests in `read_from_replica()`, which sets a context variable that
+`ReplicaRouter` consults for the models in `REPLICA_MODELS`. Everything else,
+including all writes, authentication and anything run outside a request,
+stays on the primary.
+
+Read-your-writes: after a successful unsafe request
+`ReadYourWritesMiddleware` pins the client to the primary for
+`DATABASE_REPLICA_PIN_SECONDS`, through a cookie for browsers and an
+`X-Primary-Until` response header that API clients echo back. A replica
+lagging more than `DATABASE_REPLICA_MAX_LAG` seconds behind, or failing its
+health check, is skipped until its next check.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICA_PREFIX = "replica"
+PIN_COOKIE = "primary_until"
+PIN_HEADER = "X-Primary-Until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Public catalogue data that can tolerate replication lag. Users are left
+# out on purpose: token versions and permissions must never be stale.
+REPLICA_MODELS = {
+    "config.company",
+    "config.job",
+    "config.jobdocument",
+    "config.favorite",
+}
+
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_read_alias = ContextVar("replica_read_alias", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def replication_lag(alias):
+    """Seconds the replica is behind the primary, or None if unknown."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        # SQLite copies and other non-streaming setups have no lag to report;
+        # just make sure the database answers.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return None if lag is None else float(lag)
+
+
+class ReplicaHealth:
+    """Per-process record of which replicas are usable, refreshed periodically."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_usable(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked_at, usable = self._checked.get(alias, (None, False))
+            if (
+                checked_at is not None
+                and now - checked_at < settings.DATABASE_REPLICA_CHECK_INTERVAL
+            ):
+                return usable
+            # Other threads keep the previous verdict while this one checks.
+            self._checked[alias] = (now, usable)
+        try:
+            lag = replication_lag(alias)
+        except DatabaseError:
+            lag = None
+        usable = lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG
+        with self._lock:
+            self._checked[alias] = (now, usable)
+        return usable
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+
+
+health = ReplicaHealth()
+
+
+def choose_replica():
+    usable = [alias for alias in replica_aliases() if health.is_usable(alias)]
+    return random.choice(usable) if usable else None
+
+
+def pinned_until(request):
+    value = request.headers.get(PIN_HEADER) or request.COOKIES.get(PIN_COOKIE)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_pinned(request):
+    return pinned_until(request) > time.time()
+
+
+def replica_for(request):
+    """The replica to serve `request`'s reads from, or None for the primary."""
+    if request.method in SAFE_METHODS and replica_aliases() and not is_pinned(request):
+        return choose_replica()
+    return None
+
+
+@contextmanager
+def reading_from(alias):
+    """Routes catalogue reads in this context to `alias` (None: the primary)."""
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica(request):
+    # Choosing a replica may run its health check, so async code calls
+    # replica_for() through sync_to_async and uses reading_from() directly.
+    return reading_from(replica_for(request))
+
+
+@contextmanager
+def primary_reads_since(timestamp_ns):
+    """
+    Reads from the primary if something changed less than the allowed lag
+    ago (`timestamp_ns` from `time.time_ns()`), since a replica may not have
+    caught up with it yet.
+    """
+    age = (time.time_ns() - timestamp_ns) / 1e9
+    if _read_alias.get() is None or age > settings.DATABASE_REPLICA_MAX_LAG:
+        yield
+        return
+    with reading_from(None):
+        yield
+
+
+class ReplicaReadMixin:
+    """Serves a viewset's safe-method requests from a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is not None and model._meta.label_lower in REPLICA_MODELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        if (
+            request.method in SAFE_METHODS
+            or response.status_code >= 400
+            or not replica_aliases()
+        ):
+            return
+        seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+        until = f"{time.time() + seconds:.3f}"
+        response[PIN_HEADER] = until
+        response.set_cookie(
+            PIN_COOKIE,
+            until,
+            max_age=seconds,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
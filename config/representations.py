@@ -0,0 +1,145 @@
+"""
+Read-only fast path for rendering jobs.
+
+`render_job()` produces exactly what `JobSerializer` would for the same row,
+but from a flat `.values()` dict instead of model instances and nested
+serializer fields: no model or serializer instantiation, no per-row related
+lookups and display labels resolved through plain dict lookups.
+
+Authenticated readers additionally get their own state for each job
+(`VIEWER_FIELDS`), looked up with one annotated query per page or detail.
+Anonymous payloads never include it, so they stay shareable and cacheable.
+"""
+
+from django.db.models import Exists, OuterRef, Subquery
+from rest_framework import serializers
+
+from .models import Currency, ExperienceLevel, Favorite, Job, JobApplication, JobMode
+
+JOB_COLUMNS = [
+    "id",
+    "title",
+    "description",
+    "company_id",
+    "company__name",
+    "company__description",
+    "company__website",
+    "company__owner_id",
+    "company__location",
+    "company__latitude",
+    "company__longitude",
+    "company__created_at",
+    "location",
+    "latitude",
+    "longitude",
+    "posted_by__email",
+    "created_at",
+    "updated_at",
+    "is_active",
+    "experience",
+    "min_experience_years",
+    "max_experience_years",
+    "mode",
+    "salary",
+    "salary_currency",
+    "category",
+]
+
+EXPERIENCE_LABELS = dict(ExperienceLevel.choices)
+MODE_LABELS = dict(JobMode.choices)
+CURRENCY_LABELS = dict(Currency.choices)
+
+# Reuse DRF's own datetime formatting so timezone handling and the "Z"
+# suffix stay identical to JobSerializer.
+format_datetime = serializers.DateTimeField().to_representation
+
+
+def job_rows(queryset):
+    """
+    Turns a Job queryset into one that yields flat dicts for `render_job()`.
+    Annotations (e.g. a search rank) are kept so pagination can key on them.
+    """
+    return queryset.values(*JOB_COLUMNS, *queryset.query.annotations)
+
+
+VIEWER_FIELDS = ["is_favorited", "application_status"]
+
+
+def viewer_annotations(user):
+    """Annotations of the user's own state for each job; none if anonymous."""
+    if not user.is_authenticated:
+        return {}
+    return {
+        "is_favorited": Exists(
+            Favorite.objects.filter(user_id=user.pk, job_id=OuterRef("pk"))
+        ),
+        "application_status": Subquery(
+            JobApplication.objects.filter(
+                applicant_id=user.pk, job_id=OuterRef("pk")
+            ).values("status")[:1]
+        ),
+    }
+
+
+def add_viewer_state(payloads, user):
+    """
+    Adds the user's VIEWER_FIELDS to rendered job payloads (in place), with a
+    single query for all of them.
+    """
+    annotations = viewer_annotations(user)
+    if not annotations or not payloads:
+        return payloads
+    states = {
+        row[0]: row[1:]
+        for row in Job.objects.filter(pk__in=[payload["id"] for payload in payloads])
+        .annotate(**annotations)
+        .values_list("pk", *VIEWER_FIELDS)
+    }
+    for payload in payloads:
+        payload.update(zip(VIEWER_FIELDS, states.get(payload["id"], (False, None))))
+    return payloads
+
+
+def _datetime(value):
+    return None if value is None else format_datetime(value)
+
+
+def render_job(row):
+    experience = row["experience"]
+    mode = row["mode"]
+    salary_currency = row["salary_currency"]
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "company": {
+            "id": row["company_id"],
+            "name": row["company__name"],
+            "description": row["company__description"],
+            "website": row["company__website"],
+            "owner": row["company__owner_id"],
+            "location": row["company__location"],
+            "latitude": row["company__latitude"],
+            "longitude": row["company__longitude"],
+            "created_at": _datetime(row["company__created_at"]),
+        },
+        "location": row["location"],
+        "latitude": row["latitude"],
+        "longitude": row["longitude"],
+        "posted_by": row["posted_by__email"],
+        "created_at": _datetime(row["created_at"]),
+        "updated_at": _datetime(row["updated_at"]),
+        "is_active": row["is_active"],
+        "experience": experience,
+        "min_experience_years": row["min_experience_years"],
+        "max_experience_years": row["max_experience_years"],
+        "mode": mode,
+        "salary": row["salary"],
+        "salary_currency": salary_currency,
+        "category": row["category"],
+        "experience_display": EXPERIENCE_LABELS.get(experience, experience),
+        "mode_display": MODE_LABELS.get(mode, mode),
+        "salary_currency_display": CURRENCY_LABELS.get(
+            salary_currency, salary_currency
+        ),
+    }
@@ -0,0 +1,88 @@
+"""
+Currency-normalized salaries.
+
+`Job.salary_usd` holds each salary converted to USD with the locally
+maintained ExchangeRate table, so cross-currency salary filters and ordering
+are plain indexed comparisons instead of a per-row CASE over currencies. It is
+computed on every save and import; when a rate changes, `recompute()` updates
+the jobs in that currency in batches (queued automatically by
+config.signals, or run through `manage.py recompute_salaries`).
+
+Listings that filter or order by normalized salary depend on the
+SALARY_RATES_SCOPE generation, which every recompute bumps.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, Value
+from django.db.models.functions import Cast, Round
+
+from .cache import bump_generations_on_commit
+from .models import ExchangeRate, Job
+
+SALARY_RATES_SCOPE = "salary-rates"
+RATES_CACHE_KEY = "exchange-rates"
+RATES_CACHE_TIMEOUT = 60 * 60
+
+
+def usd_rates():
+    """{currency: USD value of one unit}, cached until a rate changes."""
+    rates = cache.get(RATES_CACHE_KEY)
+    if rates is None:
+        rates = dict(ExchangeRate.objects.values_list("currency", "usd_rate"))
+        cache.set(RATES_CACHE_KEY, rates, RATES_CACHE_TIMEOUT)
+    return rates
+
+
+def forget_rates_on_commit():
+    transaction.on_commit(lambda: cache.delete(RATES_CACHE_KEY))
+
+
+def to_usd(amount, currency, rates=None, rounding=ROUND_HALF_UP):
+    """
+    `amount` of `currency` in whole USD, or None if it can't be converted.
+    Filter bounds pass `rounding` so they never admit salaries past them.
+    """
+    if amount is None or currency is None:
+        return None
+    rate = (usd_rates() if rates is None else rates).get(currency)
+    if rate is None:
+        return None
+    usd = Decimal(amount) * rate
+    return int(usd.quantize(Decimal(1), rounding=rounding))
+
+
+def recompute(currency, batch_size=1000):
+    """
+    Recomputes `salary_usd` of every job paid in `currency` with its current
+    rate, one id range per transaction. Returns how many jobs were updated.
+    """
+    rate = (
+        ExchangeRate.objects.filter(currency=currency)
+        .values_list("usd_rate", flat=True)
+        .first()
+    )
+    if rate is None:
+        salary_usd = Value(None, output_field=IntegerField())
+    else:
+        salary_usd = Cast(
+            Round(F("salary") * Value(rate, output_field=DecimalField())),
+            IntegerField(),
+        )
+    jobs = Job.objects.filter(salary_currency=currency).order_by("id")
+    ids = jobs.values_list("id", flat=True)
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(ids.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        with transaction.atomic():
+            updated += jobs.filter(id__gte=batch[0], id__lte=last_id).update(
+                salary_usd=salary_usd
+            )
+            bump_generations_on_commit([SALARY_RATES_SCOPE])
+    return updated
@@ -0,0 +1,158 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is done
+once per code version instead of per request: `build_schema` writes it to
+`OPENAPI_SCHEMA_DIR` at deploy time, and a process that finds no file for
+the current version generates it on first use. Each process then serves the
+rendered documents from memory with an ETag.
+
+The code version is a hash of the project's Python sources and the installed
+Django, DRF and drf-spectacular versions, so any code change produces a new
+schema file and stale ones are never served.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import django
+import drf_spectacular
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+SCHEMA_RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+SCHEMA_FILE_PREFIX = "openapi-"
+
+
+def _source_files():
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = {Path(settings.BASE_DIR) / settings.ROOT_URLCONF.split(".")[0]}
+    roots.update(
+        Path(app_config.path)
+        for app_config in apps.get_app_configs()
+        if Path(app_config.path).resolve().is_relative_to(base_dir)
+    )
+    for root in sorted(roots):
+        yield from sorted(root.rglob("*.py"))
+
+
+def code_version():
+    digest = hashlib.md5()
+    for version in (
+        django.get_version(),
+        rest_framework.VERSION,
+        drf_spectacular.__version__,
+    ):
+        digest.update(version.encode())
+    for path in _source_files():
+        digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_path(version, schema_format):
+    return (
+        Path(settings.OPENAPI_SCHEMA_DIR)
+        / f"{SCHEMA_FILE_PREFIX}{version}.{schema_format}"
+    )
+
+
+def generate_schema():
+    """{format: rendered bytes} for the current code."""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, renderer in SCHEMA_RENDERERS.items()
+    }
+
+
+def write_schema(version, documents):
+    """Atomically stores `documents` and removes files of other versions."""
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for schema_format, body in documents.items():
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            file.write(body)
+        os.replace(file.name, schema_path(version, schema_format))
+    current = {schema_path(version, schema_format) for schema_format in documents}
+    for path in directory.glob(f"{SCHEMA_FILE_PREFIX}*"):
+        if path not in current:
+            path.unlink(missing_ok=True)
+
+
+def read_schema(version):
+    try:
+        return {
+            schema_format: schema_path(version, schema_format).read_bytes()
+            for schema_format in SCHEMA_RENDERERS
+        }
+    except FileNotFoundError:
+        return None
+
+
+class SchemaStore:
+    """The current schema documents of this process, with their ETags."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = None
+
+    def get(self, schema_format):
+        """(etag, body) of the schema rendered as `schema_format`."""
+        if self._documents is None:
+            with self._lock:
+                if self._documents is None:
+                    self._documents = self._load()
+        return self._documents[schema_format]
+
+    def _load(self):
+        version = code_version()
+        documents = read_schema(version)
+        if documents is None:
+            documents = generate_schema()
+            try:
+                write_schema(version, documents)
+            except OSError:
+                # Read-only filesystem: keep serving it from memory.
+                pass
+        return {
+            schema_format: (f'"{hashlib.md5(body).hexdigest()}"', body)
+            for schema_format, body in documents.items()
+        }
+
+
+schema_store = SchemaStore()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """`SpectacularAPIView` serving the precomputed schema."""
+
+    def get(self, request, *args, **kwargs):
+        # Translated or versioned schemas are rare; generate those as usual.
+        if request.GET.get("lang") or request.GET.get("version"):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        etag, body = schema_store.get(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            response = HttpResponse(body, content_type=content_type)
+            title = spectacular_settings.TITLE or "schema"
+            response["Content-Disposition"] = (
+                f'inline; filename="{title}.{renderer.format}"'
+            )
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,166 @@
+from functools import lru_cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+
+from .models import Company, Job
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "config_job_fts"
+
+# Fields that make up a job's search document, with their weight. Postgres
+# ranks A > B > C > D; the SQLite bm25() weights below mirror that order.
+SEARCH_WEIGHTS = {
+    "title": "A",
+    "category": "B",
+    "company_name": "B",
+    "location": "C",
+    "description": "D",
+}
+FTS_BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+
+# Saving a job with update_fields outside of this set leaves its search
+# document untouched.
+SEARCHABLE_JOB_FIELDS = {"title", "category", "company", "location", "description"}
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Returns the full-text engine available on the `using` connection:
+    "postgres", "fts5", or None when only the icontains fallback is available.
+    """
+    return _detect_backend(using)
+
+
+@lru_cache
+def _detect_backend(using):
+    # Cached per alias: the schema doesn't change while the process runs.
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return "postgres"
+    if connection.vendor == "sqlite" and _fts_table_exists(connection):
+        return "fts5"
+    return None
+
+
+def _fts_table_exists(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def _search_vector():
+    company_name = Subquery(
+        Company.objects.filter(pk=OuterRef("company_id")).values("name")[:1]
+    )
+    sources = {
+        "title": "title",
+        "category": "category",
+        "company_name": company_name,
+        "location": "location",
+        "description": "description",
+    }
+    vector = None
+    for name, source in sources.items():
+        part = SearchVector(source, weight=SEARCH_WEIGHTS[name], config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_documents(job_ids=None):
+    """
+    Rebuilds the search document of the given jobs (or every job when
+    `job_ids` is None) in a single statement per backend.
+    """
+    backend = search_backend()
+    if backend == "postgres":
+        queryset = Job.objects.all()
+        if job_ids is not None:
+            queryset = queryset.filter(pk__in=job_ids)
+        queryset.update(search_vector=_search_vector())
+    elif backend == "fts5":
+        _update_fts_rows(job_ids)
+
+
+def _update_fts_rows(job_ids):
+    where, params = "", []
+    if job_ids is not None:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(job_ids))
+        where = f" WHERE j.id IN ({placeholders})"
+        params = job_ids
+    with connection.cursor() as cursor:
+        if job_ids is None:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        else:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", params
+            )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, title, category, company_name, location, description) "
+            "SELECT j.id, j.title, COALESCE(j.category, ''), c.name, j.location, "
+            "j.description FROM config_job j "
+            "INNER JOIN config_company c ON c.id = j.company_id" + where,
+            params,
+        )
+
+
+def delete_search_documents(job_ids):
+    # Postgres keeps the vector on the job row itself, so only the FTS5
+    # side table needs explicit cleanup.
+    job_ids = list(job_ids)
+    if not job_ids or search_backend() != "fts5":
+        return
+    placeholders = ", ".join(["%s"] * len(job_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", job_ids
+        )
+
+
+def _fts_match_expression(terms):
+    # Every term must match (implicit AND); each one is quoted so user input
+    # can't inject FTS5 operators, and treated as a prefix.
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_jobs(queryset, terms):
+    """
+    Filters `queryset` down to jobs matching all `terms` and annotates each
+    row with a `search_rank` (higher is more relevant). Returns None when no
+    full-text engine is available so callers can fall back to icontains.
+    """
+    backend = search_backend(queryset.db)
+    if backend == "postgres":
+        query = SearchQuery(
+            " ".join(terms), search_type="websearch", config=SEARCH_CONFIG
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+        )
+    if backend == "fts5":
+        match = _fts_match_expression(terms)
+        weights = ", ".join(
+            str(FTS_BM25_WEIGHTS[weight]) for weight in SEARCH_WEIGHTS.values()
+        )
+        matching_ids = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        )
+        # bm25() is lower-is-better, so negate it to keep a single
+        # "higher ranks first" convention across backends.
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {Job._meta.db_table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matching_ids).annotate(search_rank=rank)
+    return None
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from .models import CustomUser, Job, Company, JobApplication, Favorite
+from .uploads import CLAIMED_UPLOAD_MESSAGE, claim_upload
+from .authentication import add_user_claims
+from .throttling import LoginRateThrottle
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -32,6 +37,9 @@ class CompanySerializer(serializers.ModelSerializer):
             "description",
             "website",
             "owner",
+            "location",
+            "latitude",
+            "longitude",
             "created_at",
         ]
 
@@ -70,6 +78,12 @@ class JobCreateSerializer(serializers.ModelSerializer):
 class JobApplicationSerializer(serializers.ModelSerializer):
     applicant = serializers.StringRelatedField(read_only=True)
     resume = serializers.FileField(required=False)
+    resume_upload = serializers.CharField(
+        write_only=True,
+        required=False,
+        help_text="Upload token from /api/applications/upload-url/, "
+        "instead of sending the file itself.",
+    )
 
     class Meta:
         model = JobApplication
@@ -78,16 +92,57 @@ class JobApplicationSerializer(serializers.ModelSerializer):
             "job",
             "applicant",
             "resume",
+            "resume_upload",
             "cover_letter",
             "status",
             "created_at",
         ]
         read_only_fields = ["status", "applicant", "created_at"]
 
+    def validate(self, attrs):
+        if "resume" in attrs and "resume_upload" in attrs:
+            raise serializers.ValidationError(
+                "Send either resume or resume_upload, not both."
+            )
+        return attrs
+
+    def validate_resume_upload(self, value):
+        return claim_upload(value, self.context["request"].user)
+
     def create(self, validated_data):
         user = self.context["request"].user
         validated_data["applicant"] = user
-        return super().create(validated_data)
+        upload = validated_data.pop("resume_upload", None)
+        if not upload:
+            return super().create(validated_data)
+        # Already in storage; assigning the name attaches it as is.
+        validated_data["resume"] = upload
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # Lost a race with another application claiming the same upload.
+            if JobApplication.objects.filter(resume=upload).exists():
+                raise serializers.ValidationError(
+                    {"resume_upload": [CLAIMED_UPLOAD_MESSAGE]}
+                )
+            raise
+
+
+class ResumeUploadRequestSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=settings.RESUME_UPLOAD_CONTENT_TYPES)
+    size = serializers.IntegerField(
+        min_value=1, max_value=settings.RESUME_UPLOAD_MAX_BYTES
+    )
+
+
+class ResumeUploadSerializer(serializers.Serializer):
+    upload_token = serializers.CharField()
+    method = serializers.CharField()
+    url = serializers.URLField()
+    headers = serializers.DictField(child=serializers.CharField())
+    max_bytes = serializers.IntegerField()
+    expires_in = serializers.IntegerField()
 
 
 class JobApplicationUpdateSerializer(serializers.ModelSerializer):
@@ -115,6 +170,20 @@ class JobSerializer(serializers.ModelSerializer):
         source="get_salary_currency_display", read_only=True
     )
 
+    # Only present for authenticated readers (see config.representations).
+    is_favorited = serializers.BooleanField(
+        read_only=True,
+        required=False,
+        help_text="Whether you have favorited this job. Authenticated requests only.",
+    )
+    application_status = serializers.ChoiceField(
+        choices=JobApplication.STATUS_CHOICES,
+        read_only=True,
+        required=False,
+        help_text="Status of your application to this job, null if you haven't "
+        "applied. Authenticated requests only.",
+    )
+
     class Meta:
         model = Job
         fields = [
@@ -124,6 +193,8 @@ class JobSerializer(serializers.ModelSerializer):
             "company",
             "company_id",
             "location",
+            "latitude",
+            "longitude",
             "posted_by",
             "created_at",
             "updated_at",
@@ -138,9 +209,43 @@ class JobSerializer(serializers.ModelSerializer):
             "experience_display",
             "mode_display",
             "salary_currency_display",
+            "is_favorited",
+            "application_status",
         ]
 
 
+class FacetValueSerializer(serializers.Serializer):
+    value = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+
+class JobFacetsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    facets = serializers.DictField(child=FacetValueSerializer(many=True))
+
+
+class JobImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=["csv", "jsonl"],
+        required=False,
+        help_text="Defaults to the file extension, then csv.",
+    )
+
+
+class JobImportErrorSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class JobImportReportSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = JobImportErrorSerializer(many=True)
+    errors_truncated = serializers.BooleanField()
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
     job = serializers.StringRelatedField(read_only=True)
@@ -169,10 +274,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token["email"] = user.email
-        token["role"] = user.role
+        add_user_claims(token, user)
         return token
 
 
 class CustomerTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginRateThrottle]
@@ -0,0 +1,166 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import forget_token_version_on_commit
+from .cache import bump_generations_on_commit
+from .documents import render_documents
+from .geo import coordinates
+from .models import (
+    Company,
+    CustomUser,
+    ExchangeRate,
+    Favorite,
+    Job,
+    JobApplication,
+    TokenUser,
+)
+from .salaries import SALARY_RATES_SCOPE, forget_rates_on_commit, to_usd
+from .search import (
+    SEARCHABLE_JOB_FIELDS,
+    delete_search_documents,
+    update_search_documents,
+)
+from .taskqueue import enqueue
+from .tasks import recompute_salaries
+
+
+def _job_scopes(job_id, company_id):
+    return ["jobs", f"job:{job_id}", f"company:{company_id}"]
+
+
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Job)
+def geocode_location(sender, instance, update_fields=None, **kwargs):
+    # Saves that include `location` also save the coordinates, see
+    # DerivedFieldsModel.
+    if update_fields is None or "location" in update_fields:
+        instance.latitude, instance.longitude = coordinates(instance.location)
+
+
+@receiver(pre_save, sender=Job)
+def normalize_salary(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"salary", "salary_currency"} & set(update_fields):
+        instance.salary_usd = to_usd(instance.salary, instance.salary_currency)
+
+
+@receiver(pre_save, sender=Job)
+def job_saving(sender, instance, **kwargs):
+    # Remember the previous company so its cached listings are invalidated
+    # too when a job moves between companies.
+    if not instance._state.adding:
+        instance._previous_company_id = (
+            Job.objects.filter(pk=instance.pk)
+            .values_list("company_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCHABLE_JOB_FIELDS & set(update_fields):
+        update_search_documents([instance.pk])
+    render_documents([instance.pk])
+
+    scopes = _job_scopes(instance.pk, instance.company_id)
+    previous_company_id = getattr(instance, "_previous_company_id", None)
+    if previous_company_id not in (None, instance.company_id):
+        scopes.append(f"company:{previous_company_id}")
+    bump_generations_on_commit(scopes)
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    delete_search_documents([instance.pk])
+    bump_generations_on_commit(_job_scopes(instance.pk, instance.company_id))
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    scopes = ["companies", f"company:{instance.pk}"]
+    if not created:
+        # Jobs embed their company, so their cached payloads go stale too.
+        job_ids = list(instance.jobs.values_list("id", flat=True))
+        scopes += ["jobs"] + [f"job:{job_id}" for job_id in job_ids]
+        if update_fields is None or "name" in update_fields:
+            update_search_documents(job_ids)
+        render_documents(job_ids)
+    bump_generations_on_commit(scopes)
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    bump_generations_on_commit(["companies", f"company:{instance.pk}", "jobs"])
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def exchange_rate_changed(sender, instance, **kwargs):
+    forget_rates_on_commit()
+    bump_generations_on_commit([SALARY_RATES_SCOPE])
+    enqueue(recompute_salaries, currency=instance.currency)
+
+
+# Job payloads carry the reader's own favorite and application state.
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    bump_generations_on_commit([f"user:{instance.user_id}"])
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def application_changed(sender, instance, **kwargs):
+    bump_generations_on_commit([f"user:{instance.applicant_id}"])
+
+
+# Users authenticated by JWT are TokenUser proxies, which send their own
+# signals.
+@receiver(pre_save, sender=CustomUser)
+@receiver(pre_save, sender=TokenUser)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    fields = CustomUser.TOKEN_REVOKING_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    instance._revokes_tokens = False
+    if instance._state.adding or not fields:
+        return
+    previous = CustomUser.objects.filter(pk=instance.pk).values_list(*fields).first()
+    current = tuple(getattr(instance, field) for field in fields)
+    instance._revokes_tokens = previous is not None and previous != current
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=TokenUser)
+def revoke_tokens(sender, instance, **kwargs):
+    if not getattr(instance, "_revokes_tokens", False):
+        return
+    # Updated separately so saves with update_fields bump it too.
+    CustomUser.objects.filter(pk=instance.pk).update(
+        token_version=F("token_version") + 1
+    )
+    instance.token_version = (
+        CustomUser.objects.filter(pk=instance.pk)
+        .values_list("token_version", flat=True)
+        .get()
+    )
+    forget_token_version_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=TokenUser)
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # Jobs render their poster's email; skip saves that can't have changed it
+    # (e.g. the last_login update on every login).
+    if created or (update_fields is not None and "email" not in update_fields):
+        return
+    jobs = list(instance.jobs.values_list("id", "company_id"))
+    if not jobs:
+        return
+    render_documents([job_id for job_id, _ in jobs])
+    scopes = []
+    for job_id, company_id in jobs:
+        scopes += _job_scopes(job_id, company_id)
+    bump_generations_on_commit(scopes)
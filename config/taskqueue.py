@@ -0,0 +1,135 @@
+"""
+Database-backed background tasks.
+
+Functions decorated with `@task` are queued with `enqueue()`, which inserts a
+Task row once the surrounding transaction commits, so workers never see work
+for data that was rolled back. `manage.py run_tasks` claims due tasks with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so any number of workers can share the
+table. Delivery is at-least-once: a task is retried with exponential backoff
+when it raises, and becomes visible again if its worker dies mid-run, so task
+functions must be idempotent. Either way each run counts as an attempt, so
+even a task that keeps crashing its worker fails after `max_attempts`.
+
+With `TASKS_EAGER` set (e.g. in tests) tasks run in-process right after the
+commit instead, with no worker involved and no retries; failures are logged.
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 10
+RETRY_MAX_DELAY = 60 * 60
+
+registry = {}
+
+
+def task(func=None, *, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Registers a function as a task under its dotted path."""
+
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__name__}"
+        func.max_attempts = max_attempts
+        registry[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(func, **payload):
+    """
+    Queues `func(**payload)` to run after the current transaction commits.
+    The payload must be JSON-serializable; pass ids rather than instances.
+    """
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: run_eagerly(func, payload))
+        return
+    transaction.on_commit(
+        lambda: Task.objects.create(
+            name=func.task_name, payload=payload, max_attempts=func.max_attempts
+        )
+    )
+
+
+def run_eagerly(func, payload):
+    """
+    Runs a task in-process. As with a worker, a failure is logged rather than
+    raised, so it never reaches the request whose transaction queued it.
+    """
+    try:
+        func(**payload)
+    except Exception:
+        logger.exception("Task %s failed", func.task_name)
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    # Jitter spreads out retries of tasks that failed together.
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def claim_tasks(worker, limit, visibility_timeout):
+    """
+    Locks up to `limit` due tasks for `worker` and returns them with their
+    attempt counted. Due tasks that already used up their attempts, i.e.
+    whose last worker died mid-run, are marked failed instead.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by("run_at")
+            .values_list("id", "attempts", "max_attempts")[:limit]
+        )
+        exhausted = [pk for pk, attempts, maximum in due if attempts >= maximum]
+        if exhausted:
+            logger.error("Tasks %s failed: their worker stopped mid-run", exhausted)
+            Task.objects.filter(id__in=exhausted).update(
+                status=Task.FAILED,
+                last_error="Worker stopped before the task finished.",
+                locked_by="",
+            )
+        ids = [pk for pk, attempts, maximum in due if attempts < maximum]
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids).update(
+            run_at=now + timedelta(seconds=visibility_timeout),
+            attempts=F("attempts") + 1,
+            locked_by=worker,
+        )
+    return list(Task.objects.filter(id__in=ids).order_by("run_at", "id"))
+
+
+def run_task(task):
+    """Runs a claimed task, then deletes it or schedules its retry."""
+    func = registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {task.name!r}")
+        func(**task.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if func is None or task.attempts >= task.max_attempts:
+            logger.error("Task %s (%s) failed:\n%s", task.pk, task.name, error)
+            changes = {"status": Task.FAILED}
+        else:
+            logger.warning("Task %s (%s) will be retried", task.pk, task.name)
+            changes = {"run_at": timezone.now() + retry_delay(task.attempts)}
+        Task.objects.filter(pk=task.pk).update(
+            last_error=error, locked_by="", **changes
+        )
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
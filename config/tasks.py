@@ -0,0 +1,68 @@
+"""
+Background tasks for side effects of API writes. Each runs at least once,
+possibly more, so they must tolerate repeats and vanished rows.
+"""
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .models import JobApplication
+from .salaries import recompute
+from .taskqueue import task
+from .uploads import resume_storage
+
+
+def _application(application_id):
+    return (
+        JobApplication.objects.select_related("job__company__owner", "applicant")
+        .filter(pk=application_id)
+        .first()
+    )
+
+
+@task
+def send_application_submitted(application_id):
+    application = _application(application_id)
+    if application is None:
+        return
+    job = application.job
+    send_mail(
+        f"Application received: {job.title}",
+        f"Your application for {job.title} at {job.company.name} was received.",
+        settings.DEFAULT_FROM_EMAIL,
+        [application.applicant.email],
+    )
+    send_mail(
+        f"New application for {job.title}",
+        f"{application.applicant.email} applied for {job.title}.",
+        settings.DEFAULT_FROM_EMAIL,
+        [job.company.owner.email],
+    )
+
+
+@task
+def send_application_status_changed(application_id, status):
+    application = _application(application_id)
+    # Skip notifications superseded by a later status change.
+    if application is None or application.status != status:
+        return
+    job = application.job
+    send_mail(
+        f"Application update: {job.title}",
+        f"Your application for {job.title} at {job.company.name} is now "
+        f"{application.get_status_display()}.",
+        settings.DEFAULT_FROM_EMAIL,
+        [application.applicant.email],
+    )
+
+
+@task
+def delete_resume_files(names):
+    storage = resume_storage()
+    for name in names:
+        storage.delete(name)
+
+
+@task
+def recompute_salaries(currency):
+    recompute(currency)
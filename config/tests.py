@@ -1,3 +1,1526 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.db.models import F, QuerySet
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from drf_spectacular.settings import spectacular_settings
+from prometheus_client import REGISTRY
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import (
+    CachedBasicAuthentication,
+    StatelessJWTAuthentication,
+    VerifiedCredentials,
+    verified_credentials,
+)
+from .cache import response_cache_key
+from .dbpool import connection_pools, pool_stats
+from .documents import DOCUMENT_VERSION
+from .facets import job_facets
+from .metrics import PoolObserver
+from .geo import geocode
+from .importers import JobImporter
+from .models import (
+    Company,
+    CustomUser,
+    Favorite,
+    Job,
+    JobApplication,
+    JobDocument,
+    Task,
+    TokenUser,
+)
+from .pagination import PageOrCursorPagination
+from .renderers import ORJSONRenderer
+from .replicas import (
+    PIN_COOKIE,
+    PIN_HEADER,
+    ReplicaRouter,
+    health,
+    reading_from,
+    replica_for,
+)
+from .representations import VIEWER_FIELDS, job_rows, render_job
+from .salaries import to_usd
+from .schema import SchemaStore, code_version, schema_path, write_schema
+from .search import _detect_backend, search_backend, search_jobs
+from .serializers import CustomTokenObtainPairSerializer, JobSerializer
+from .tasks import send_application_status_changed
+from .taskqueue import (
+    RETRY_BASE_DELAY,
+    claim_tasks,
+    enqueue,
+    retry_delay,
+    run_task,
+    task,
+)
+from .throttling import memory_buckets, parse_rate, take_tokens
+from .uploads import UPLOAD_SALT, resume_storage, sweep_unclaimed_uploads
+
+
+def make_user(email="owner@example.com", **fields):
+    return CustomUser.objects.create_user(
+        username=email.split("@")[0], email=email, password="password", **fields
+    )
+
+
+def make_company(owner, **fields):
+    fields.setdefault("name", "Acme")
+    fields.setdefault("description", "Widgets")
+    return Company.objects.create(owner=owner, **fields)
+
+
+def make_job(company, **fields):
+    fields.setdefault("title", "Engineer")
+    fields.setdefault("description", "Builds things")
+    fields.setdefault("location", "Nairobi")
+    return Job.objects.create(company=company, posted_by=company.owner, **fields)
+
+
+class ResponseCacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_blank_values_are_part_of_the_key(self):
+        plain = response_cache_key("jobs.list", [1], QueryDict(""))
+        cursor = response_cache_key("jobs.list", [1], QueryDict("cursor="))
+        self.assertNotEqual(plain, cursor)
+
+    def test_parameter_order_is_ignored(self):
+        self.assertEqual(
+            response_cache_key("jobs.list", [1], QueryDict("a=1&b=2")),
+            response_cache_key("jobs.list", [1], QueryDict("b=2&a=1")),
+        )
+
+    def test_cursor_opt_in_is_not_served_the_page_number_body(self):
+        make_job(make_company(make_user()))
+        client = APIClient()
+        for first, second in [("", "?cursor="), ("?cursor=", "")]:
+            cache.clear()
+            client.get(f"/api/jobs/{first}")
+            response = client.get(f"/api/jobs/{second}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual("count" in response.data, second == "")
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = make_company(make_user())
+        self.url = f"/api/companies/{self.company.pk}/"
+
+    def test_etag_changes_on_write_within_the_same_second(self):
+        client = APIClient()
+        first = client.get(self.url)
+        self.assertNotIn("Last-Modified", first)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = "Renamed"
+            self.company.save()
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Renamed")
+
+    def test_matching_etag_returns_304(self):
+        client = APIClient()
+        etag = client.get(self.url)["ETag"]
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_alone_never_returns_304(self):
+        response = APIClient().get(
+            self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    def paginate(self, queryset, url):
+        paginator = PageOrCursorPagination()
+        paginator.page_size = 2
+        request = Request(APIRequestFactory().get(url))
+        rows = paginator.paginate_queryset(queryset, request)
+        return rows, paginator.get_paginated_response([]).data["next"]
+
+    def test_foreign_key_ordering_keys_on_the_raw_id(self):
+        user = make_user()
+        company = make_company(user)
+        jobs = [make_job(company) for _ in range(5)]
+        for job in reversed(jobs):
+            Favorite.objects.create(user=user, job=job)
+        queryset = Favorite.objects.order_by("job")
+
+        seen = []
+        url = "/api/favorites/?cursor="
+        while url:
+            rows, url = self.paginate(queryset, url)
+            seen += [row.job_id for row in rows]
+        self.assertEqual(seen, sorted(job.pk for job in jobs))
+
+    def test_favorites_ignore_unlisted_ordering_fields(self):
+        user = make_user()
+        company = make_company(user)
+        for _ in range(11):
+            Favorite.objects.create(user=user, job=make_job(company))
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/api/favorites/?cursor=&ordering=job")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data["next"])
+        self.assertEqual(client.get(response.data["next"]).status_code, 200)
+
+
+class GeocodingTests(TestCase):
+    def test_update_fields_with_location_saves_coordinates(self):
+        company = make_company(make_user(), location="Nairobi")
+        job = make_job(company, location="Nairobi")
+        for instance in (company, job):
+            instance.location = "Lagos"
+            instance.save(update_fields=["location"])
+            instance.refresh_from_db()
+            self.assertEqual((instance.latitude, instance.longitude), geocode("Lagos"))
+
+    def test_update_fields_without_location_keeps_coordinates(self):
+        job = make_job(make_company(make_user()), location="Nairobi")
+        job.title = "Senior Engineer"
+        job.save(update_fields=["title"])
+        job.refresh_from_db()
+        self.assertEqual((job.latitude, job.longitude), geocode("Nairobi"))
+
+
+class SalaryNormalizationTests(TestCase):
+    def test_update_fields_with_salary_saves_salary_usd(self):
+        job = make_job(make_company(make_user()), salary=100000, salary_currency="KES")
+        job.salary = 200000
+        job.save(update_fields=["salary"])
+        job.refresh_from_db()
+        self.assertEqual(job.salary_usd, to_usd(200000, "KES"))
+
+        job.salary_currency = "USD"
+        job.save(update_fields=["salary_currency"])
+        job.refresh_from_db()
+        self.assertEqual(job.salary_usd, 200000)
+
+    def test_salary_in_bounds_never_admit_salaries_past_them(self):
+        cache.clear()
+        make_job(make_company(make_user()), salary=77, salary_currency="USD")
+        client = APIClient()
+        # 10050 KES is 77.39 USD and 9970 KES is 76.77 USD.
+        for query in ["salary_gte=10050", "salary_lte=9970"]:
+            response = client.get(f"/api/jobs/?salary_in=KES&{query}")
+            self.assertEqual(response.data["count"], 0, query)
+        for query in ["salary_gte=9935", "salary_lte=10050"]:
+            response = client.get(f"/api/jobs/?salary_in=KES&{query}")
+            self.assertEqual(response.data["count"], 1, query)
+
+
+calls = []
+
+
+@task(max_attempts=2)
+def record_call(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def always_fail():
+    raise RuntimeError("boom")
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def enqueue(self, func, **payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(func, **payload)
+        return Task.objects.latest("id")
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            enqueue(record_call, value=1)
+            self.assertFalse(Task.objects.exists())
+        callbacks[0]()
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.payload, {"value": 1})
+        self.assertEqual(task_row.max_attempts, 2)
+
+    def test_claim_counts_the_attempt_and_hides_the_task(self):
+        queued = self.enqueue(record_call, value=1)
+        Task.objects.create(
+            name=record_call.task_name,
+            payload={"value": 2},
+            run_at=timezone.now() + timedelta(hours=1),
+        )
+        claimed = claim_tasks("worker", 10, visibility_timeout=60)
+        self.assertEqual([row.pk for row in claimed], [queued.pk])
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(claimed[0].locked_by, "worker")
+        self.assertGreater(claimed[0].run_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(claim_tasks("other", 10, visibility_timeout=60), [])
+
+    def test_success_deletes_the_task(self):
+        self.enqueue(record_call, value=1)
+        (claimed,) = claim_tasks("worker", 10, visibility_timeout=60)
+        self.assertTrue(run_task(claimed))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failure_is_retried_with_backoff_then_marked_failed(self):
+        queued = self.enqueue(always_fail)
+        (claimed,) = claim_tasks("worker", 10, visibility_timeout=60)
+        before = timezone.now()
+        self.assertFalse(run_task(claimed))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertIn("boom", queued.last_error)
+        delay = queued.run_at - before
+        self.assertGreaterEqual(delay, timedelta(seconds=RETRY_BASE_DELAY / 2))
+        self.assertLessEqual(delay, timedelta(seconds=RETRY_BASE_DELAY + 1))
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        (claimed,) = claim_tasks("worker", 10, visibility_timeout=60)
+        self.assertFalse(run_task(claimed))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    def test_retry_delay_grows_exponentially(self):
+        for attempts in range(1, 5):
+            delay = retry_delay(attempts).total_seconds()
+            full = RETRY_BASE_DELAY * 2 ** (attempts - 1)
+            self.assertTrue(full / 2 <= delay <= full)
+
+    def test_task_crashing_its_worker_fails_after_max_attempts(self):
+        queued = self.enqueue(record_call, value=1)
+        # Each claim expires straight away, as if the worker died mid-run.
+        for attempt in range(1, queued.max_attempts + 1):
+            (claimed,) = claim_tasks("worker", 10, visibility_timeout=0)
+            self.assertEqual(claimed.attempts, attempt)
+        self.assertEqual(claim_tasks("worker", 10, visibility_timeout=0), [])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_failure_is_logged_not_raised(self):
+        with self.assertLogs("config.taskqueue", "ERROR") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue(always_fail)
+                enqueue(record_call, value=1)
+        self.assertIn(always_fail.task_name, logs.output[0])
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(TASKS_EAGER=True)
+class ApplicationNotificationTests(TestCase):
+    def setUp(self):
+        memory_buckets.clear()
+        self.owner = make_user("owner@example.com")
+        self.applicant = make_user("applicant@example.com")
+        self.job = make_job(make_company(self.owner), title="Engineer")
+
+    def apply(self):
+        client = APIClient()
+        client.force_authenticate(self.applicant)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                "/api/applications/", {"job": self.job.pk}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        return JobApplication.objects.get(pk=response.data["id"])
+
+    def test_applying_notifies_the_applicant_and_the_company_owner(self):
+        self.apply()
+        self.assertEqual(
+            sorted((message.to[0], message.subject) for message in mail.outbox),
+            [
+                ("applicant@example.com", "Application received: Engineer"),
+                ("owner@example.com", "New application for Engineer"),
+            ],
+        )
+
+    def test_status_change_notifies_the_applicant_once(self):
+        application = self.apply()
+        mail.outbox.clear()
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = f"/api/applications/{application.pk}/"
+        for status in ("review", "review"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.patch(url, {"status": status}, format="json")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["applicant@example.com"])
+        self.assertIn("Under Review", mail.outbox[0].body)
+
+    def test_superseded_status_change_is_not_sent(self):
+        application = self.apply()
+        mail.outbox.clear()
+        JobApplication.objects.filter(pk=application.pk).update(status="hired")
+        send_application_status_changed(application.pk, "review")
+        send_application_status_changed(application.pk + 100, "review")
+        self.assertEqual(mail.outbox, [])
+
+    def test_failing_email_does_not_fail_the_application(self):
+        with mock.patch("config.tasks.send_mail", side_effect=OSError("SMTP down")):
+            with self.assertLogs("config.taskqueue", "ERROR"):
+                application = self.apply()
+        self.assertTrue(JobApplication.objects.filter(pk=application.pk).exists())
+
+
+PDF = b"%PDF-1.7\n" + b"0" * 100
+
+
+class ResumeUploadTests(TestCase):
+    def setUp(self):
+        memory_buckets.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(
+            override_settings(MEDIA_ROOT=media_root, RESUME_UPLOAD_MAX_BYTES=1024)
+        )
+        self.user = make_user()
+        self.job = make_job(make_company(make_user("employer@example.com")))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_slot(self):
+        response = self.client.post(
+            "/api/applications/upload-url/",
+            {"content_type": "application/pdf", "size": len(PDF)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def put(self, slot, body):
+        return self.client.put(slot["url"], body, content_type="application/pdf")
+
+    def apply(self, slot):
+        return self.client.post(
+            "/api/applications/",
+            {"job": self.job.pk, "resume_upload": slot["upload_token"]},
+            format="json",
+        )
+
+    def key(self, slot):
+        return signing.loads(slot["upload_token"], salt=UPLOAD_SALT)["k"]
+
+    def stored_files(self):
+        root = settings.MEDIA_ROOT
+        return [name for _, _, names in os.walk(root) for name in names]
+
+    def test_verified_upload_is_attached(self):
+        slot = self.upload_slot()
+        self.assertEqual(self.put(slot, PDF).status_code, 204)
+        response = self.apply(slot)
+        self.assertEqual(response.status_code, 201)
+        application = JobApplication.objects.get()
+        self.assertEqual(application.resume.name, self.key(slot))
+
+    def test_upload_url_works_once(self):
+        slot = self.upload_slot()
+        self.assertEqual(self.put(slot, PDF).status_code, 204)
+        self.assertEqual(self.put(slot, b"%PDF-other").status_code, 403)
+        with resume_storage().open(self.key(slot)) as stored:
+            self.assertEqual(stored.read(), PDF)
+
+    def test_concurrent_put_loses_without_overwriting(self):
+        slot = self.upload_slot()
+        self.assertEqual(self.put(slot, PDF).status_code, 204)
+        # A PUT that passed the exists() check before the first one landed.
+        with mock.patch.object(FileSystemStorage, "exists", return_value=False):
+            self.assertEqual(self.put(slot, b"%PDF-other").status_code, 403)
+        with resume_storage().open(self.key(slot)) as stored:
+            self.assertEqual(stored.read(), PDF)
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_oversized_put_is_rejected_and_discarded(self):
+        slot = self.upload_slot()
+        response = self.put(slot, b"%PDF-" + b"0" * 1024)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_oversized_object_is_rejected_on_claim(self):
+        slot = self.upload_slot()
+        # Object storage only enforces the size when the upload is claimed.
+        resume_storage().save(self.key(slot), ContentFile(b"%PDF-" + b"0" * 1024))
+        response = self.apply(slot)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("between 1 and 1024 bytes", str(response.data))
+        self.assertFalse(resume_storage().exists(self.key(slot)))
+
+    def test_mismatched_magic_bytes_are_rejected_on_claim(self):
+        slot = self.upload_slot()
+        self.assertEqual(self.put(slot, b"MZ\x90\x00 not a pdf").status_code, 204)
+        response = self.apply(slot)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("does not match its declared type", str(response.data))
+        self.assertFalse(resume_storage().exists(self.key(slot)))
+        self.assertFalse(JobApplication.objects.exists())
+
+    def test_an_upload_is_attached_to_one_application_only(self):
+        slot = self.upload_slot()
+        self.assertEqual(self.put(slot, PDF).status_code, 204)
+        self.assertEqual(self.apply(slot).status_code, 201)
+        other_job = make_job(self.job.company, title="Other")
+        # A second claim whose exists() check in claim_upload() ran before the
+        # first one was saved.
+        real_exists, calls = QuerySet.exists, []
+
+        def exists(queryset):
+            calls.append(queryset)
+            return len(calls) > 1 and real_exists(queryset)
+
+        with mock.patch.object(QuerySet, "exists", exists):
+            response = self.client.post(
+                "/api/applications/",
+                {"job": other_job.pk, "resume_upload": slot["upload_token"]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already been used", str(response.data["resume_upload"]))
+        self.assertEqual(JobApplication.objects.count(), 1)
+
+    def test_sweep_deletes_only_expired_unclaimed_uploads(self):
+        storage = resume_storage()
+        claimed, unclaimed, recent = (self.upload_slot() for _ in range(3))
+        for slot in (claimed, unclaimed, recent):
+            self.assertEqual(self.put(slot, PDF).status_code, 204)
+        self.assertEqual(self.apply(claimed).status_code, 201)
+        expired = time.time() - (
+            settings.RESUME_UPLOAD_TOKEN_MAX_AGE + settings.RESUME_UPLOAD_EXPIRY + 60
+        )
+        for slot in (claimed, unclaimed):
+            os.utime(storage.path(self.key(slot)), (expired, expired))
+
+        self.assertEqual(sweep_unclaimed_uploads(), 1)
+        self.assertTrue(storage.exists(self.key(claimed)))
+        self.assertFalse(storage.exists(self.key(unclaimed)))
+        self.assertTrue(storage.exists(self.key(recent)))
+
+
+class SearchTests(TestCase):
+    def test_search_uses_the_index_and_probes_the_schema_once(self):
+        company = make_company(make_user())
+        make_job(company, title="Python developer")
+        make_job(company, title="Accountant")
+        _detect_backend.cache_clear()
+        self.assertEqual(search_backend(), "fts5")
+        with CaptureQueriesContext(connection) as queries:
+            results = search_jobs(Job.objects.all(), ["python"])
+            self.assertEqual([job.title for job in results], ["Python developer"])
+            search_jobs(Job.objects.all(), ["accountant"]).count()
+        self.assertFalse(
+            any("sqlite_master" in query["sql"] for query in queries.captured_queries)
+        )
+
+
+class JobDocumentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.job = make_job(make_company(make_user()))
+
+    def test_list_renders_missing_documents_without_storing_them(self):
+        stored = APIClient().get("/api/jobs/").data["results"]
+        JobDocument.objects.all().delete()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get("/api/jobs/")
+        self.assertEqual(response.data["results"], stored)
+        self.assertFalse(JobDocument.objects.exists())
+        self.assertFalse(
+            any(
+                query["sql"].startswith(("INSERT", "UPDATE"))
+                for query in queries.captured_queries
+            )
+        )
+
+
+class RebuildJobDocumentsTests(TransactionTestCase):
+    # The command renders in worker threads, which need committed rows.
+
+    def test_outdated_only_renders_stale_documents(self):
+        job = make_job(make_company(make_user()))
+        other = make_job(job.company, title="Designer")
+        JobDocument.objects.filter(job=job).delete()
+        JobDocument.objects.filter(job=other).update(version=DOCUMENT_VERSION - 1)
+        fresh = make_job(job.company, title="Writer")
+        rendered_at = JobDocument.objects.get(job=fresh).rendered_at
+
+        call_command("rebuild_job_documents", "--outdated", stdout=io.StringIO())
+        self.assertEqual(
+            JobDocument.objects.filter(version=DOCUMENT_VERSION).count(), 3
+        )
+        self.assertEqual(JobDocument.objects.get(job=fresh).rendered_at, rendered_at)
+
+
+class JobImporterTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.company = make_company(self.user)
+
+    def rows(self, title):
+        data = {
+            "company_id": self.company.pk,
+            "external_id": "a",
+            "title": title,
+            "description": "d",
+            "location": "Lagos",
+        }
+        return [(2, data)]
+
+    def test_reimport_updates_by_external_id(self):
+        JobImporter(self.user).run(self.rows("First"))
+        report = JobImporter(self.user).run(self.rows("Second"))
+        self.assertEqual((report["created"], report["updated"]), (0, 1))
+        self.assertEqual(Job.objects.get().title, "Second")
+
+    def test_rows_inserted_concurrently_are_retried_as_updates(self):
+        JobImporter(self.user).run(self.rows("First"))
+        importer = JobImporter(self.user)
+        lookups = []
+
+        def stale_then_real(rows):
+            lookups.append(rows)
+            # The first lookup ran before the other import committed its row.
+            return (
+                {} if len(lookups) == 1 else JobImporter._existing_jobs(importer, rows)
+            )
+
+        with mock.patch.object(importer, "_existing_jobs", stale_then_real):
+            report = importer.run(self.rows("Second"))
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual((report["created"], report["updated"]), (0, 1))
+        self.assertEqual(report["failed"], 0)
+        self.assertEqual(Job.objects.get().title, "Second")
+
+
+REDIS_DOWN = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        # Nothing listens on port 1, so every call fails straight away.
+        "LOCATION": "redis://127.0.0.1:1/0",
+        "OPTIONS": {"SOCKET_CONNECT_TIMEOUT": 0.5, "SOCKET_TIMEOUT": 0.5},
+    }
+}
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        memory_buckets.clear()
+
+    def test_unreachable_redis_falls_back_to_memory_buckets(self):
+        buckets = [("throttle:test:ip:1", 2, 2 / 60)]
+        with override_settings(CACHES=REDIS_DOWN):
+            self.assertEqual(take_tokens(buckets), 0)
+            self.assertEqual(take_tokens(buckets), 0)
+            wait = take_tokens(buckets)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 30)
+
+    def test_request_needs_a_token_from_every_bucket(self):
+        ip, email = ("throttle:test:ip:1", 5, 1.0), ("throttle:test:email:a", 1, 1.0)
+        self.assertEqual(memory_buckets.take([ip, email]), 0)
+        self.assertGreater(memory_buckets.take([ip, email]), 0)
+        # The rejected request took nothing from the IP bucket.
+        for _ in range(4):
+            self.assertEqual(memory_buckets.take([ip]), 0)
+        self.assertGreater(memory_buckets.take([ip]), 0)
+
+    def test_tokens_refill_over_time(self):
+        bucket = [("throttle:test:ip:1", 1, 1.0)]
+        with mock.patch("config.throttling.time.monotonic", return_value=100.0):
+            self.assertEqual(memory_buckets.take(bucket), 0)
+            self.assertAlmostEqual(memory_buckets.take(bucket), 1.0)
+        with mock.patch("config.throttling.time.monotonic", return_value=101.0):
+            self.assertEqual(memory_buckets.take(bucket), 0)
+
+    def test_login_is_throttled_per_email_before_checking_the_password(self):
+        make_user("reader@example.com")
+        client = APIClient()
+        credentials = {"email": "reader@example.com", "password": "wrong"}
+        limit, _ = parse_rate(api_settings.DEFAULT_THROTTLE_RATES["login.email"])
+        for _ in range(limit):
+            self.assertEqual(client.post("/api/login/", credentials).status_code, 401)
+        with mock.patch("django.contrib.auth.hashers.check_password") as check:
+            response = client.post("/api/login/", credentials)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        check.assert_not_called()
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        self.owner = make_user()
+        job = make_job(make_company(self.owner))
+        self.cover_letters = ['=HYPERLINK("http://evil")', "+1", "-2", "@A1", "fine"]
+        for number, cover_letter in enumerate(self.cover_letters):
+            JobApplication.objects.create(
+                job=job,
+                applicant=make_user(f"applicant{number}@example.com"),
+                cover_letter=cover_letter,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def export(self, export_format="csv"):
+        response = self.client.get(
+            f"/api/applications/export/?export_format={export_format}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response
+
+    def test_csv_cells_cannot_start_formulas(self):
+        response = self.export()
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(
+            sorted(row["cover_letter"] for row in rows),
+            sorted(
+                value if value == "fine" else "'" + value
+                for value in self.cover_letters
+            ),
+        )
+
+    def test_ndjson_keeps_values_verbatim(self):
+        response = self.export("ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            sorted(json.loads(line)["cover_letter"] for line in lines),
+            sorted(self.cover_letters),
+        )
+
+    def test_export_streams_in_chunks(self):
+        with mock.patch("config.exports.ROWS_PER_CHUNK", 2):
+            response = self.export()
+            chunks = list(response.streaming_content)
+        # The header and five rows, two lines per chunk.
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[0].startswith(b"id,job,job_title,"))
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        health.clear()
+        patcher = mock.patch(
+            "config.replicas.replica_aliases", return_value=["replica1"]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+    def test_catalogue_reads_go_to_the_chosen_replica(self):
+        router = ReplicaRouter()
+        with reading_from("replica1"):
+            self.assertEqual(router.db_for_read(Job), "replica1")
+            self.assertEqual(router.db_for_read(Company), "replica1")
+            # Users carry token versions and permissions; never stale.
+            self.assertIsNone(router.db_for_read(CustomUser))
+            self.assertEqual(router.db_for_write(Job), "default")
+        self.assertIsNone(router.db_for_read(Job))
+
+    def test_safe_requests_use_a_healthy_replica(self):
+        with mock.patch("config.replicas.replication_lag", return_value=0.0):
+            self.assertEqual(replica_for(self.factory.get("/api/jobs/")), "replica1")
+            self.assertIsNone(replica_for(self.factory.post("/api/jobs/")))
+
+    def test_lagging_or_failing_replicas_fall_back_to_the_primary(self):
+        request = self.factory.get("/api/jobs/")
+        lag = settings.DATABASE_REPLICA_MAX_LAG + 1
+        with mock.patch("config.replicas.replication_lag", return_value=lag):
+            self.assertIsNone(replica_for(request))
+        health.clear()
+        with mock.patch(
+            "config.replicas.replication_lag", side_effect=DatabaseError("down")
+        ):
+            self.assertIsNone(replica_for(request))
+
+    def test_health_is_rechecked_after_the_interval(self):
+        with mock.patch("config.replicas.replication_lag", return_value=0.0) as lag:
+            health.is_usable("replica1")
+            health.is_usable("replica1")
+            self.assertEqual(lag.call_count, 1)
+            with mock.patch(
+                "config.replicas.time.monotonic",
+                return_value=time.monotonic()
+                + settings.DATABASE_REPLICA_CHECK_INTERVAL
+                + 1,
+            ):
+                health.is_usable("replica1")
+            self.assertEqual(lag.call_count, 2)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        user = make_user()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            "/api/companies/", {"name": "Acme", "description": "Widgets"}
+        )
+        self.assertEqual(response.status_code, 201)
+        until = response[PIN_HEADER]
+        self.assertEqual(response.cookies[PIN_COOKIE].value, until)
+
+        with mock.patch("config.replicas.replication_lag", return_value=0.0):
+            pinned = self.factory.get("/api/jobs/", HTTP_X_PRIMARY_UNTIL=until)
+            self.assertIsNone(replica_for(pinned))
+            expired = self.factory.get(
+                "/api/jobs/", HTTP_X_PRIMARY_UNTIL=f"{time.time() - 1:.3f}"
+            )
+            self.assertEqual(replica_for(expired), "replica1")
+
+    def test_failed_writes_do_not_pin(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        response = client.post("/api/companies/", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(PIN_HEADER, response)
+
+
+class JobFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        company = make_company(make_user())
+        make_job(company, title="Python developer", mode="remote", salary=10000)
+        make_job(company, title="Python lead", mode="remote", salary=25000)
+        make_job(company, title="Go developer", mode="onsite", salary=250000)
+        make_job(company, title="Designer", mode="hybrid", location="Lagos")
+
+    def facets(self, query=""):
+        response = APIClient().get(f"/api/jobs/facets/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, data, name):
+        return {item["value"]: item["count"] for item in data["facets"][name]}
+
+    def test_counts_every_dimension_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = job_facets(Job.objects.all())
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(
+            self.counts(data, "mode"), {"remote": 2, "onsite": 1, "hybrid": 1}
+        )
+        self.assertEqual(self.counts(data, "location"), {"Nairobi": 3, "Lagos": 1})
+        # The most common value comes first.
+        self.assertEqual(data["facets"]["mode"][0]["value"], "remote")
+
+    def test_salaries_are_bucketed_with_exclusive_upper_bounds(self):
+        self.assertEqual(
+            self.counts(self.facets(), "salary"),
+            {"0-24999": 1, "25000-49999": 1, "200000+": 1, None: 1},
+        )
+
+    def test_facets_follow_filters_and_search(self):
+        data = self.facets("?mode=remote")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(self.counts(data, "mode"), {"remote": 2})
+
+        data = self.facets("?search=python")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(self.counts(data, "salary"), {"0-24999": 1, "25000-49999": 1})
+
+        data = self.facets("?search=developer&mode=onsite")
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(self.counts(data, "salary"), {"200000+": 1})
+
+
+class JobRepresentationTests(TestCase):
+    def test_fast_path_renders_the_same_bytes_as_job_serializer(self):
+        owner = make_user("owner@example.com", first_name="Ann")
+        full = make_company(owner, website="https://acme.example", location="Nairobi")
+        bare = make_company(make_user("bare@example.com"), name="Bare")
+        make_job(
+            full,
+            title="Ingénieur ☃",
+            location="Nairobi",
+            experience="senior",
+            mode="remote",
+            min_experience_years=3,
+            max_experience_years=8,
+            salary=123456,
+            salary_currency="KES",
+            category="Engineering",
+        )
+        # Unknown location, no salary, experience or category: nulls throughout.
+        make_job(bare, location="Atlantis", is_active=False)
+        Job.objects.filter(title="Engineer").update(
+            created_at=timezone.now().replace(microsecond=123456)
+        )
+
+        jobs = Job.objects.select_related("company", "posted_by").order_by("id")
+        expected = JSONRenderer().render(JobSerializer(jobs, many=True).data)
+        rows = job_rows(Job.objects.order_by("id"))
+        self.assertEqual(
+            ORJSONRenderer().render([render_job(row) for row in rows]), expected
+        )
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = make_company(make_user())
+        for number in range(12):
+            make_job(self.company, title=f"Job {number}")
+
+    async def sync_get(self, url):
+        return await sync_to_async(APIClient().get)(url)
+
+    async def test_job_list_pages_like_the_sync_view(self):
+        response = await self.async_client.get("/api/async/jobs/?page=2")
+        self.assertEqual(response.status_code, 200)
+        expected = (await self.sync_get("/api/jobs/?page=2")).json()
+        data = response.json()
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(data["results"], expected["results"])
+        self.assertIn("/api/async/jobs/", data["previous"])
+
+    async def test_job_list_follows_cursors(self):
+        first = (await self.async_client.get("/api/async/jobs/?cursor=")).json()
+        self.assertNotIn("count", first)
+        second = (await self.async_client.get(first["next"])).json()
+        titles = [job["title"] for job in first["results"] + second["results"]]
+        self.assertEqual(titles, [f"Job {number}" for number in range(11, -1, -1)])
+        self.assertIsNone(second["next"])
+
+    async def test_repeat_reads_are_served_from_the_cache(self):
+        url = f"/api/async/companies/{self.company.pk}/"
+        first = await self.async_client.get(url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        second = await self.async_client.get(url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second.json(), (await self.sync_get(url)).json())
+
+        not_modified = await self.async_client.get(
+            url, headers={"If-None-Match": first["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_writes_invalidate_cached_lists(self):
+        url = "/api/async/companies/"
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "MISS")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "HIT")
+
+        def rename():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.company.name = "Renamed"
+                self.company.save()
+
+        await sync_to_async(rename)()
+        response = await self.async_client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["name"], "Renamed")
+
+    async def test_unknown_ids_and_writes_are_rejected(self):
+        response = await self.async_client.get("/api/async/jobs/999999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("detail", response.json())
+        response = await self.async_client.post("/api/async/jobs/")
+        self.assertEqual(response.status_code, 405)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user(first_name="Ann")
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        return user
+
+    def access_token(self):
+        return str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def change_password(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("changed")
+            self.user.save()
+
+    def test_user_is_built_from_claims_and_loads_the_rest_lazily(self):
+        token = self.access_token()
+        self.authenticate(token)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertIsInstance(user, TokenUser)
+            self.assertEqual(
+                (user.pk, user.email, user.role),
+                (self.user.pk, self.user.email, "user"),
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, "Ann")
+            self.assertEqual(user.username, "owner")
+
+    def test_password_change_revokes_issued_tokens(self):
+        token = self.access_token()
+        self.authenticate(token)
+        self.change_password()
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate(token)
+        self.assertEqual(raised.exception.detail["code"], "token_revoked")
+        self.assertEqual(self.authenticate(self.access_token()).pk, self.user.pk)
+
+    def test_deactivated_user_is_rejected(self):
+        token = self.access_token()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_current_version_is_cached_for_the_timeout(self):
+        token = self.access_token()
+        self.authenticate(token)
+        # A bump that skipped the signal (e.g. made from another codebase)
+        # only takes effect once the cached version expires.
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            token_version=F("token_version") + 1
+        )
+        self.assertEqual(self.authenticate(token).pk, self.user.pk)
+        expired = time.time() + settings.TOKEN_VERSION_CACHE_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time") as now:
+            now.return_value = expired
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(token)
+
+    def test_legacy_tokens_are_looked_up_until_the_first_revocation(self):
+        token = str(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertNotIsInstance(user, TokenUser)
+        self.assertEqual(user.pk, self.user.pk)
+        self.change_password()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+
+class CachedBasicAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        verified_credentials.clear()
+        self.addCleanup(verified_credentials.clear)
+        self.user = make_user()
+
+    def authenticate(self, password="password", client="10.0.0.1"):
+        credentials = base64.b64encode(f"{self.user.email}:{password}".encode())
+        request = APIRequestFactory().get(
+            "/",
+            HTTP_AUTHORIZATION=f"Basic {credentials.decode()}",
+            REMOTE_ADDR=client,
+        )
+        user, _ = CachedBasicAuthentication().authenticate(request)
+        return user
+
+    def count_hashes(self):
+        return mock.patch.object(
+            CustomUser,
+            "check_password",
+            autospec=True,
+            side_effect=CustomUser.check_password,
+        )
+
+    def test_repeat_requests_skip_the_hash_and_the_query(self):
+        self.authenticate()
+        with self.count_hashes() as check, self.assertNumQueries(0):
+            user = self.authenticate()
+            user.first_name = "Changed"
+        check.assert_not_called()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(self.authenticate().first_name, "")
+
+    def test_password_change_ends_cached_verifications(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("changed")
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(self.authenticate("changed").pk, self.user.pk)
+
+    def test_verifications_expire_after_the_ttl(self):
+        self.authenticate()
+        expired = time.monotonic() + settings.BASIC_AUTH_CACHE_TTL + 1
+        with self.count_hashes() as check:
+            with mock.patch(
+                "config.authentication.time.monotonic", return_value=expired
+            ):
+                self.authenticate()
+        check.assert_called_once()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        credentials = VerifiedCredentials(max_size=2, ttl=60)
+        for digest in ("a", "b"):
+            credentials.add(digest, self.user)
+        credentials.get("a")
+        credentials.add("c", self.user)
+        self.assertIsNotNone(credentials.get("a"))
+        self.assertIsNone(credentials.get("b"))
+        self.assertIsNotNone(credentials.get("c"))
+
+    @override_settings(BASIC_AUTH_FAILURE_LIMIT=3)
+    def test_lockout_is_per_client_and_reset_by_a_success(self):
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate("wrong")
+        self.authenticate()
+        # The success cleared the count, so three more attempts are allowed.
+        for _ in range(3):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate("wrong")
+        with self.assertRaises(Throttled):
+            self.authenticate()
+        # Another client is not locked out of the account.
+        self.assertEqual(self.authenticate(client="10.0.0.2").pk, self.user.pk)
+
+    @override_settings(BASIC_AUTH_CLIENT_FAILURE_LIMIT=3)
+    def test_client_guessing_many_usernames_is_locked_out(self):
+        for number in range(3):
+            self.user = make_user(f"user{number}@example.com")
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate("wrong")
+        with self.assertRaises(Throttled):
+            self.authenticate()
+
+
+@override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1.0)
+class SQLInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = make_company(make_user())
+        self.url = f"/api/companies/{self.company.pk}/"
+
+    def get(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get(self.url)
+
+    def test_server_timing_is_only_sent_to_staff(self):
+        with self.assertLogs("config.sql", "INFO"):
+            self.assertNotIn("Server-Timing", self.get())
+            self.assertNotIn("Server-Timing", self.get(make_user("a@example.com")))
+            staff = make_user("staff@example.com", is_staff=True)
+            timing = self.get(staff)["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries, \d+ repeated"')
+
+    @override_settings(SQL_SERVER_TIMING=True)
+    def test_server_timing_can_be_sent_to_everyone(self):
+        with self.assertLogs("config.sql", "INFO"):
+            self.assertIn("Server-Timing", self.get())
+
+    def test_only_sampled_requests_are_instrumented(self):
+        with override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0):
+            with self.assertNoLogs("config.sql"):
+                self.get()
+        with override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0.5):
+            with mock.patch("config.middleware.random.random", return_value=0.7):
+                with self.assertNoLogs("config.sql"):
+                    self.get()
+            with mock.patch("config.middleware.random.random", return_value=0.3):
+                with self.assertLogs("config.sql", "INFO"):
+                    self.get()
+
+    def test_log_line_reports_queries_and_repeats(self):
+        with self.assertLogs("config.sql", "INFO") as logs:
+            self.get()
+        message = logs.records[0].getMessage()
+        self.assertTrue(message.startswith("request_sql "))
+        fields = json.loads(message.split(" ", 1)[1])
+        self.assertEqual(fields["path"], self.url)
+        self.assertEqual(fields["status"], 200)
+        self.assertGreater(fields["queries"], 0)
+        self.assertIn("SELECT", fields["slowest_sql"])
+        self.assertNotIn("trace", fields)
+
+    @override_settings(SQL_SLOW_REQUEST_MS=0)
+    def test_slow_requests_log_their_trace(self):
+        for number in range(3):
+            make_job(self.company, title=f"Job {number}")
+        with self.assertLogs("config.sql", "WARNING") as logs:
+            # Treat every statement as the same one, as an N+1 loop would.
+            with mock.patch(
+                "config.middleware.fingerprint", side_effect=lambda sql: "same"
+            ):
+                APIClient().get("/api/jobs/")
+        message = logs.records[0].getMessage()
+        self.assertTrue(message.startswith("slow_request "))
+        fields = json.loads(message.split(" ", 1)[1])
+        self.assertEqual(len(fields["trace"]), fields["queries"])
+        self.assertEqual(
+            fields["duplicates"], [{"count": fields["queries"], "sql": "same"}]
+        )
+        self.assertEqual({entry["db"] for entry in fields["trace"]}, {"default"})
+
+
+MULTIPROCESS_SAMPLE = """
+from prometheus_client import Counter
+Counter("jobs_board_test_events", "Test events.").inc()
+"""
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_observed_per_view_and_action(self):
+        make_job(make_company(make_user()))
+        labels = {"view": "JobViewSet.list", "method": "GET", "status": "200"}
+        latency = "jobs_board_http_request_duration_seconds_count"
+        before = self.sample(latency, **labels)
+        queries = self.sample(
+            "jobs_board_http_request_db_queries_sum", view="JobViewSet.list"
+        )
+        response = APIClient().get("/api/jobs/")
+        self.assertEqual(self.sample(latency, **labels), before + 1)
+        self.assertGreater(
+            self.sample(
+                "jobs_board_http_request_db_queries_sum", view="JobViewSet.list"
+            ),
+            queries,
+        )
+        self.assertGreaterEqual(
+            self.sample(
+                "jobs_board_http_response_size_bytes_sum", view="JobViewSet.list"
+            ),
+            len(response.content),
+        )
+
+    def test_pools_are_sampled_when_scraped_not_per_request(self):
+        stats = {"default": {"pool_size": 4, "pool_available": 3}}
+        with mock.patch("config.metrics.pool_stats", return_value=stats) as sampled:
+            APIClient().get("/api/jobs/")
+            sampled.assert_not_called()
+            response = self.client.get("/metrics")
+        sampled.assert_called_once()
+        self.assertIn(
+            b'jobs_board_db_pool_connections{database="default",state="size"} 4.0',
+            response.content,
+        )
+
+    def test_each_process_samples_its_pools_at_most_once_per_interval(self):
+        observer = PoolObserver(interval=15)
+        with mock.patch("config.metrics.pool_stats", return_value={}) as sampled:
+            with mock.patch("config.metrics.time.monotonic", return_value=100.0):
+                observer.sample_if_due()
+                observer.sample_if_due()
+            self.assertEqual(sampled.call_count, 1)
+            with mock.patch("config.metrics.time.monotonic", return_value=116.0):
+                observer.sample_if_due()
+            self.assertEqual(sampled.call_count, 2)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_require_the_token_when_set(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get(
+            "/metrics", headers={"Authorization": "Bearer wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            "/metrics", headers={"Authorization": "Bearer secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"jobs_board_http_requests_in_flight", response.content)
+
+    def test_multiprocess_samples_are_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", MULTIPROCESS_SAMPLE], env=env, check=True
+            )
+        with mock.patch("config.metrics.MULTIPROC_DIR", directory):
+            response = self.client.get("/metrics")
+        self.assertIn(b"jobs_board_test_events_total 2.0", response.content)
+
+
+class FakePool:
+    def get_stats(self):
+        return {"pool_size": 2, "pool_available": 1}
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs os.fork()")
+class ConnectionPoolForkTests(TestCase):
+    def setUp(self):
+        # Stand-in for the psycopg pool Django keeps on the backend class.
+        self.pool = FakePool()
+        self.enterContext(
+            mock.patch.object(
+                type(connections[connection.alias]),
+                "_connection_pools",
+                {connection.alias: self.pool},
+                create=True,
+            )
+        )
+
+    def test_pool_stats_reports_every_open_pool(self):
+        self.assertEqual(
+            pool_stats(), {connection.alias: {"pool_size": 2, "pool_available": 1}}
+        )
+
+    def test_forked_child_drops_inherited_pools_and_connections(self):
+        connection.ensure_connection()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_end)
+                state = {
+                    "pools": list(connection_pools()),
+                    "connection": connection.connection is None,
+                }
+                os.write(write_end, json.dumps(state).encode())
+            finally:
+                os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            state = json.loads(pipe.read())
+        os.waitpid(pid, 0)
+        self.assertEqual(state, {"pools": [], "connection": True})
+        # The parent keeps using its own.
+        self.assertEqual(connection_pools(), {connection.alias: self.pool})
+        self.assertIsNotNone(connection.connection)
+
+
+class SchemaTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.enterContext(override_settings(OPENAPI_SCHEMA_DIR=self.directory))
+        self.enterContext(mock.patch("config.schema.schema_store", SchemaStore()))
+        # Known warnings about views without serializers; not under test here.
+        self.enterContext(
+            mock.patch.object(spectacular_settings, "DISABLE_ERRORS_AND_WARNINGS", True)
+        )
+
+    def test_schema_is_served_with_an_etag_and_answers_304(self):
+        response = self.client.get("/api/schema/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"securitySchemes", response.content)
+        # Generated on the fly by SpectacularAPIView itself.
+        fresh = self.client.get("/api/schema/?lang=en")
+        self.assertEqual(response.content, fresh.content)
+
+        etag = response["ETag"]
+        response = self.client.get("/api/schema/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        other = self.client.get("/api/schema/?format=json")
+        self.assertNotEqual(other["ETag"], etag)
+
+    def test_stored_schema_is_reused_by_new_processes(self):
+        version = code_version()
+        self.client.get("/api/schema/")
+        self.assertTrue(schema_path(version, "yaml").exists())
+        with mock.patch("config.schema.generate_schema") as generate:
+            with mock.patch("config.schema.schema_store", SchemaStore()):
+                self.assertEqual(self.client.get("/api/schema/").status_code, 200)
+        generate.assert_not_called()
+
+    def test_code_version_changes_with_the_code(self):
+        source = Path(self.directory) / "views.py"
+        source.write_text("VALUE = 1\n")
+        with override_settings(BASE_DIR=self.directory), mock.patch(
+            "config.schema._source_files", return_value=[source]
+        ):
+            before = code_version()
+            self.assertEqual(code_version(), before)
+            source.write_text("VALUE = 2\n")
+            self.assertNotEqual(code_version(), before)
+
+    def test_writing_a_version_removes_older_files(self):
+        write_schema("old", {"yaml": b"a", "json": b"b"})
+        write_schema("new", {"yaml": b"c", "json": b"d"})
+        self.assertEqual(
+            sorted(path.name for path in Path(self.directory).iterdir()),
+            ["openapi-new.json", "openapi-new.yaml"],
+        )
+
+
+class JobCounterTests(TestCase):
+    def setUp(self):
+        memory_buckets.clear()
+        self.owner = make_user("owner@example.com")
+        self.applicant = make_user("applicant@example.com")
+        self.job = make_job(make_company(self.owner))
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def counts(self, *fields):
+        return list(Job.objects.values_list(*fields).get(pk=self.job.pk))
+
+    def apply(self):
+        response = self.client_for(self.applicant).post(
+            "/api/applications/", {"job": self.job.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def test_applying_and_changing_status_move_the_counters(self):
+        application_id = self.apply()
+        fields = ("applications_count", "applied_count", "review_count")
+        self.assertEqual(self.counts(*fields), [1, 1, 0])
+        url = f"/api/applications/{application_id}/"
+        for status in ("review", "review"):
+            response = self.client_for(self.owner).patch(
+                url, {"status": status}, format="json"
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(*fields), [1, 0, 1])
+
+    def test_favoriting_and_unfavoriting_move_the_counter(self):
+        client = self.client_for(self.applicant)
+        response = client.post(
+            "/api/favorites/", {"job_id": self.job.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counts("favorites_count"), [1])
+        response = client.delete(f"/api/favorites/{response.data['id']}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counts("favorites_count"), [0])
+
+    def test_drifted_counters_do_not_go_negative(self):
+        client = self.client_for(self.applicant)
+        response = client.post(
+            "/api/favorites/", {"job_id": self.job.pk}, format="json"
+        )
+        Job.objects.filter(pk=self.job.pk).update(favorites_count=0)
+        client.delete(f"/api/favorites/{response.data['id']}/")
+        self.assertEqual(self.counts("favorites_count"), [0])
+
+    def test_reconcile_repairs_drifted_jobs_only(self):
+        other = make_job(self.job.company, title="Designer")
+        self.apply()
+        JobApplication.objects.create(job=self.job, applicant=self.owner)
+        Favorite.objects.create(job=self.job, user=self.applicant)
+        Job.objects.filter(pk=self.job.pk).update(applications_count=7, hired_count=2)
+        out = io.StringIO()
+        call_command("reconcile_job_counters", "--batch-size=1", stdout=out)
+        self.assertIn("Checked 2 jobs, repaired 1.", out.getvalue())
+        fields = ("applications_count", "applied_count", "hired_count")
+        self.assertEqual(self.counts(*fields, "favorites_count"), [2, 2, 0, 1])
+        self.assertEqual(
+            list(Job.objects.values_list(*fields).get(pk=other.pk)), [0, 0, 0]
+        )
+
+    def test_only_indexed_counters_are_orderable(self):
+        newer = make_job(self.job.company, title="Designer")
+        Job.objects.filter(pk=self.job.pk).update(applications_count=3, review_count=3)
+        client = APIClient()
+
+        def ids(ordering):
+            response = client.get(f"/api/jobs/?ordering={ordering}")
+            return [job["id"] for job in response.data["results"]]
+
+        self.assertEqual(ids("-applications_count"), [self.job.pk, newer.pk])
+        # Unindexed counters are ignored, leaving the default newest-first.
+        self.assertEqual(ids("-review_count"), [newer.pk, self.job.pk])
+
+
+class ViewerStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        memory_buckets.clear()
+        self.user = make_user("viewer@example.com")
+        other = make_user("other@example.com")
+        company = make_company(make_user())
+        self.favorited, self.applied, self.untouched = (
+            make_job(company, title=title)
+            for title in ("Favorited", "Applied", "Untouched")
+        )
+        Favorite.objects.create(user=self.user, job=self.favorited)
+        JobApplication.objects.create(
+            applicant=self.user, job=self.applied, status="interview"
+        )
+        # Another user's state must not leak into the viewer's.
+        Favorite.objects.create(user=other, job=self.untouched)
+        JobApplication.objects.create(applicant=other, job=self.untouched)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def states(self, payloads):
+        return {
+            job["id"]: (job["is_favorited"], job["application_status"])
+            for job in payloads
+        }
+
+    def test_list_and_detail_show_the_viewers_own_state(self):
+        expected = {
+            self.favorited.pk: (True, None),
+            self.applied.pk: (False, "interview"),
+            self.untouched.pk: (False, None),
+        }
+        client = self.client_for(self.user)
+        response = client.get("/api/jobs/")
+        self.assertEqual(self.states(response.data["results"]), expected)
+        details = [client.get(f"/api/jobs/{pk}/").data for pk in expected]
+        self.assertEqual(self.states(details), expected)
+
+    def test_anonymous_payloads_have_no_viewer_fields(self):
+        client = self.client_for()
+        listed = client.get("/api/jobs/").data["results"]
+        detail = client.get(f"/api/jobs/{self.favorited.pk}/").data
+        for payload in [*listed, detail]:
+            self.assertFalse(set(VIEWER_FIELDS) & set(payload))
+
+    def test_viewer_state_costs_one_query_per_page(self):
+        with CaptureQueriesContext(connection) as anonymous:
+            self.client_for().get("/api/jobs/")
+        cache.clear()
+        with self.assertNumQueries(len(anonymous) + 1):
+            self.client_for(self.user).get("/api/jobs/")
+        make_job(self.favorited.company, title="Another")
+        cache.clear()
+        with self.assertNumQueries(len(anonymous) + 1):
+            self.client_for(self.user).get("/api/jobs/")
+
+    def test_detail_state_is_part_of_the_row_query(self):
+        url = f"/api/jobs/{self.applied.pk}/"
+        with CaptureQueriesContext(connection) as anonymous:
+            self.client_for().get(url)
+        cache.clear()
+        with self.assertNumQueries(len(anonymous)):
+            self.client_for(self.user).get(url)
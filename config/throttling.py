@@ -0,0 +1,227 @@
+"""
+Token-bucket throttles shared by every process and node.
+
+Each throttle scope ("login", "register", "apply", "search") checks one bucket
+per identity kind it knows about: the client IP, the email a request is
+about and the authenticated user. Budgets come from DRF's
+`DEFAULT_THROTTLE_RATES` under "<scope>.<kind>" keys; "30/min" is a bucket of
+30 tokens refilled at 30 per minute, so short bursts pass while sustained
+floods are held to the rate. A request passes only if every bucket it touches
+has a token, and then takes one from each.
+
+With the Redis cache the buckets live in Redis and are checked and updated by
+a single Lua script, i.e. one atomic round trip. Without Redis, or while it is
+unreachable, each process falls back to its own in-memory buckets.
+
+Throttles run before the view's handler, so rejected logins and
+registrations never reach the password hasher.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_PREFIX = "throttle:"
+MEMORY_MAX_BUCKETS = 10000
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# KEYS: bucket keys. ARGV: capacity and refill rate (tokens per second) of
+# each bucket in turn. Returns "0" once a token was taken from every bucket,
+# otherwise the seconds until all of them have one, taking nothing.
+TOKEN_BUCKET_LUA = """
+local now = redis.call("TIME")
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call("HMGET", key, "tokens", "ts")
+    local level = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - updated) * rate)
+    levels[i] = level
+    if level < 1 then
+        wait = math.max(wait, (1 - level) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call("HSET", key, "tokens", tostring(levels[i] - 1), "ts", tostring(now))
+    redis.call("EXPIRE", key, math.ceil(capacity / rate))
+end
+return "0"
+"""
+
+
+def parse_rate(rate):
+    """(capacity, tokens per second) of a DRF-style rate such as "5/min"."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / DURATIONS[period[0]]
+
+
+class MemoryBuckets:
+    """Per-process buckets with the same semantics as TOKEN_BUCKET_LUA."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, capacity, rate in buckets:
+                level, updated = self._buckets.get(key, (capacity, now))
+                level = min(capacity, level + (now - updated) * rate)
+                levels.append(level)
+                if level < 1:
+                    wait = max(wait, (1 - level) / rate)
+            if wait:
+                return wait
+            for (key, _, _), level in zip(buckets, levels):
+                self._buckets[key] = (level - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+memory_buckets = MemoryBuckets(MEMORY_MAX_BUCKETS)
+
+_script = None
+
+
+def _uses_redis():
+    return settings.CACHES["default"]["BACKEND"].startswith("django_redis.")
+
+
+def take_tokens(buckets):
+    """
+    Takes a token from each of `buckets`, a list of (key, capacity, rate),
+    if all of them have one. Returns 0 on success, otherwise the seconds to
+    wait.
+    """
+    global _script
+    if _uses_redis():
+        try:
+            client = get_redis_connection("default")
+            if _script is None:
+                _script = client.register_script(TOKEN_BUCKET_LUA)
+            args = []
+            for _, capacity, rate in buckets:
+                args += [capacity, rate]
+            keys = [key for key, _, _ in buckets]
+            return float(_script(keys=keys, args=args, client=client))
+        except RedisError:
+            pass
+    return memory_buckets.take(buckets)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses set `scope` and return the identities to throttle
+    from `get_idents()`; `applies()` can exempt some requests.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def applies(self, request, view):
+        return True
+
+    def get_idents(self, request, view):
+        """{kind: identity}; kinds without a configured rate are ignored."""
+        return {"ip": self.get_ident(request)}
+
+    def get_buckets(self, request, view):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        buckets = []
+        for kind, ident in self.get_idents(request, view).items():
+            rate = rates.get(f"{self.scope}.{kind}")
+            if rate is None or ident is None:
+                continue
+            capacity, per_second = parse_rate(rate)
+            buckets.append(
+                (f"{THROTTLE_PREFIX}{self.scope}.{kind}:{ident}", capacity, per_second)
+            )
+        return buckets
+
+    def allow_request(self, request, view):
+        if not self.applies(request, view):
+            return True
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+        self.wait_seconds = take_tokens(buckets)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def email_ident(request):
+    """The request's "email" field, hashed to keep addresses out of the keys."""
+    email = request.data.get("email") if hasattr(request.data, "get") else None
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return salted_hmac(THROTTLE_PREFIX, email.strip().lower()).hexdigest()
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    scope = "login"
+
+    def get_idents(self, request, view):
+        return {
+            "ip": self.get_ident(request),
+            "email": email_ident(request),
+        }
+
+
+class RegisterRateThrottle(LoginRateThrottle):
+    scope = "register"
+
+
+class ApplyRateThrottle(TokenBucketThrottle):
+    scope = "apply"
+
+    def applies(self, request, view):
+        return view.action == "create"
+
+    def get_idents(self, request, view):
+        return {"ip": self.get_ident(request), "user": request.user.pk}
+
+
+class SearchRateThrottle(TokenBucketThrottle):
+    """Throttles full-text searches, by user when authenticated, else by IP."""
+
+    scope = "search"
+
+    def applies(self, request, view):
+        return bool(request.query_params.get(api_settings.SEARCH_PARAM))
+
+    def get_idents(self, request, view):
+        if request.user.is_authenticated:
+            return {"user": request.user.pk}
+        return {"ip": self.get_ident(request)}
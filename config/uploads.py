@@ -0,0 +1,249 @@
+"""
+Two-phase resume uploads.
+
+1. The applicant asks for an upload slot and gets a signed upload token plus a
+   URL to PUT the file to: a presigned URL on S3-compatible storage (R2), or a
+   signed endpoint on this app when files are stored locally.
+2. The client uploads straight there, then creates the application with the
+   upload token. The stored object's size and leading bytes are checked
+   before it is attached to the application.
+
+Uploads that are never claimed are deleted by `manage.py sweep_resume_uploads`
+once their upload token has expired.
+
+Large request bodies therefore never pass through the app's workers in
+production.
+"""
+
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+
+from .models import JobApplication
+
+try:
+    from storages.backends.s3 import S3Storage
+except ImportError:  # pragma: no cover - django-storages is in requirements.txt
+    S3Storage = None
+
+UPLOAD_SALT = "config.uploads.resume"
+PUT_SALT = "config.uploads.resume.put"
+UPLOAD_DIRECTORY = "resumes"
+PART_SUFFIX = ".part"
+USED_UPLOAD_MESSAGE = "This upload URL has already been used."
+CLAIMED_UPLOAD_MESSAGE = "This upload has already been used."
+
+EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "application/msword": ".doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+}
+
+# Leading bytes every file of a content type starts with.
+MAGIC_BYTES = {
+    "application/pdf": b"%PDF-",
+    "application/msword": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (
+        b"PK\x03\x04"
+    ),
+}
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def resume_storage():
+    return JobApplication._meta.get_field("resume").storage
+
+
+def uses_object_storage(storage):
+    return S3Storage is not None and isinstance(storage, S3Storage)
+
+
+def issue_upload(request, content_type):
+    """
+    Reserves a storage key for one resume and returns where and how to
+    upload it, with the token that later claims it.
+    """
+    storage = resume_storage()
+    name = f"{uuid.uuid4().hex}{EXTENSIONS[content_type]}"
+    key = f"{UPLOAD_DIRECTORY}/{request.user.pk}/{name}"
+    payload = {"k": key, "u": request.user.pk, "t": content_type}
+    expiry = settings.RESUME_UPLOAD_EXPIRY
+
+    if uses_object_storage(storage):
+        url = storage.connection.meta.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": storage.bucket_name,
+                "Key": storage._normalize_name(key),
+                "ContentType": content_type,
+            },
+            ExpiresIn=expiry,
+            HttpMethod="PUT",
+        )
+    else:
+        put_token = signing.dumps(payload, salt=PUT_SALT)
+        url = request.build_absolute_uri(
+            reverse("resume-upload", kwargs={"token": put_token})
+        )
+
+    return {
+        "upload_token": signing.dumps(payload, salt=UPLOAD_SALT),
+        "method": "PUT",
+        "url": url,
+        "headers": {"Content-Type": content_type},
+        "max_bytes": settings.RESUME_UPLOAD_MAX_BYTES,
+        "expires_in": expiry,
+    }
+
+
+def receive_local_upload(token, content_type, stream):
+    """
+    Stores a PUT body for storages that can't presign URLs, enforcing the
+    same limits object storage would.
+    """
+    storage = resume_storage()
+    if uses_object_storage(storage):
+        raise NotFound()
+    try:
+        payload = signing.loads(
+            token, salt=PUT_SALT, max_age=settings.RESUME_UPLOAD_EXPIRY
+        )
+    except signing.BadSignature:
+        raise PermissionDenied("Invalid or expired upload URL.")
+    if content_type != payload["t"]:
+        raise ValidationError(f"Content-Type must be {payload['t']}.")
+    key = payload["k"]
+    if storage.exists(key):
+        raise PermissionDenied(USED_UPLOAD_MESSAGE)
+    if stream is None:
+        raise ValidationError("The upload is empty.")
+
+    # The body goes to a hidden part file next to the key, which is then
+    # hard-linked into place: linking fails if the key exists, so of two
+    # concurrent PUTs exactly one wins and no reader sees a partial file.
+    path = storage.path(key)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, part_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=PART_SUFFIX)
+    try:
+        limit = settings.RESUME_UPLOAD_MAX_BYTES
+        with os.fdopen(fd, "wb") as part:
+            received = 0
+            while chunk := stream.read(COPY_CHUNK_SIZE):
+                received += len(chunk)
+                if received > limit:
+                    raise ValidationError(f"The file must not exceed {limit} bytes.")
+                part.write(chunk)
+        if storage.file_permissions_mode is not None:
+            os.chmod(part_path, storage.file_permissions_mode)
+        try:
+            os.link(part_path, path)
+        except FileExistsError:
+            raise PermissionDenied(USED_UPLOAD_MESSAGE)
+    finally:
+        os.unlink(part_path)
+
+
+def _read_head(storage, key, length):
+    if uses_object_storage(storage):
+        # A ranged GET; opening the file would download all of it.
+        response = storage.connection.meta.client.get_object(
+            Bucket=storage.bucket_name,
+            Key=storage._normalize_name(key),
+            Range=f"bytes=0-{length - 1}",
+        )
+        return response["Body"].read()
+    with storage.open(key, "rb") as stored:
+        return stored.read(length)
+
+
+def claim_upload(token, user):
+    """
+    Returns the storage key of a verified upload, deleting the object if it
+    fails verification.
+    """
+    try:
+        payload = signing.loads(
+            token, salt=UPLOAD_SALT, max_age=settings.RESUME_UPLOAD_TOKEN_MAX_AGE
+        )
+    except signing.SignatureExpired:
+        raise ValidationError("The upload token has expired.")
+    except signing.BadSignature:
+        raise ValidationError("Invalid upload token.")
+    if payload["u"] != user.pk:
+        raise ValidationError("Invalid upload token.")
+
+    storage = resume_storage()
+    key = payload["k"]
+    if not storage.exists(key):
+        raise ValidationError("The resume has not been uploaded yet.")
+    # Only a courtesy check: two claims can both pass it, and the unique
+    # constraint on JobApplication.resume decides which one is saved.
+    if JobApplication.objects.filter(resume=key).exists():
+        raise ValidationError(CLAIMED_UPLOAD_MESSAGE)
+
+    size = storage.size(key)
+    limit = settings.RESUME_UPLOAD_MAX_BYTES
+    magic = MAGIC_BYTES[payload["t"]]
+    if not 0 < size <= limit:
+        error = f"The file must be between 1 and {limit} bytes."
+    elif _read_head(storage, key, len(magic)) != magic:
+        error = "The file content does not match its declared type."
+    else:
+        return key
+    storage.delete(key)
+    raise ValidationError(error)
+
+
+def unclaimed_uploads(storage, cutoff):
+    """
+    Keys of direct uploads last modified before `cutoff` that no application
+    references, including part files left behind by interrupted PUTs.
+    """
+    try:
+        user_directories, _ = storage.listdir(UPLOAD_DIRECTORY)
+    except FileNotFoundError:
+        return
+    for user_directory in user_directories:
+        # Resumes posted as multipart forms live directly in UPLOAD_DIRECTORY.
+        if not user_directory.isdigit():
+            continue
+        directory = f"{UPLOAD_DIRECTORY}/{user_directory}"
+        _, names = storage.listdir(directory)
+        keys = [
+            f"{directory}/{name}"
+            for name in names
+            if storage.get_modified_time(f"{directory}/{name}") < cutoff
+        ]
+        claimed = set(
+            JobApplication.objects.filter(resume__in=keys).values_list(
+                "resume", flat=True
+            )
+        )
+        yield from (key for key in keys if key not in claimed)
+
+
+def sweep_unclaimed_uploads():
+    """
+    Deletes uploads whose upload token can no longer claim them. Returns how
+    many were deleted.
+    """
+    storage = resume_storage()
+    # A file is uploaded after its token was issued, so the token expires
+    # within RESUME_UPLOAD_TOKEN_MAX_AGE of the upload; the rest is slack for
+    # claims still in flight.
+    max_age = settings.RESUME_UPLOAD_TOKEN_MAX_AGE + settings.RESUME_UPLOAD_EXPIRY
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    deleted = 0
+    for key in list(unclaimed_uploads(storage, cutoff)):
+        storage.delete(key)
+        deleted += 1
+    return deleted
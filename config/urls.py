@@ -6,10 +6,12 @@ from .views import (
     CompanyViewSet,
     FavoriteViewSet,
     JobApplicationViewSet,
+    ResumeUploadView,
 )
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 from .serializers import CustomerTokenObtainPairView
 from rest_framework.routers import DefaultRouter
+from . import async_views
 
 router = DefaultRouter()
 router.register(r"companies", CompanyViewSet, basename="companies")
@@ -22,6 +24,24 @@ urlpatterns = [
     path("users/", UserListView.as_view(), name="user-list"),
     path("register/", RegisterUserView.as_view(), name="register"),
     path("login/", CustomerTokenObtainPairView.as_view(), name="login"),
+    path(
+        "uploads/resumes/<str:token>/",
+        ResumeUploadView.as_view(),
+        name="resume-upload",
+    ),
+    path("async/jobs/", async_views.job_list, name="async-job-list"),
+    path(
+        "async/jobs/facets/",
+        async_views.job_facet_counts,
+        name="async-job-facets",
+    ),
+    path("async/jobs/<int:pk>/", async_views.job_detail, name="async-job-detail"),
+    path("async/companies/", async_views.company_list, name="async-company-list"),
+    path(
+        "async/companies/<int:pk>/",
+        async_views.company_detail,
+        name="async-company-detail",
+    ),
     path("", include(router.urls)),
     path("refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("verify/", TokenVerifyView.as_view(), name="token_verify"),
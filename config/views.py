@@ -2,7 +2,8 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins
-from django.shortcuts import redirect
+from rest_framework.decorators import action
+from django.shortcuts import redirect, get_object_or_404
 from .serializers import (
     JobSerializer,
     UserSerializer,
@@ -11,6 +12,11 @@ from .serializers import (
     JobApplicationSerializer,
     JobApplicationUpdateSerializer,
     FavoriteSerializer,
+    JobFacetsSerializer,
+    JobImportSerializer,
+    JobImportReportSerializer,
+    ResumeUploadRequestSerializer,
+    ResumeUploadSerializer,
 )
 from .models import Job, CustomUser, JobApplication, Favorite, Company
 from rest_framework import generics
@@ -19,10 +25,36 @@ from .permissions import IsAdminUserRole, IsCompanyOwnerOrAdmin
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.parsers import MultiPartParser, FormParser
-from django.db import models
-from drf_spectacular.utils import extend_schema
-from .filters import JobFilter
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.db import models, transaction
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from .filters import JobFilter, JobOrderingFilter, JobSearchFilter, NearFilter
+from .pagination import PageOrCursorPagination
+from . import counters
+from .cache import CachedReadMixin
+from .counters import COUNTERS_SCOPE, ORDERING_COUNTERS
+from .replicas import ReplicaReadMixin
+from .salaries import SALARY_RATES_SCOPE
+from .facets import job_facets
+from .representations import (
+    add_viewer_state,
+    job_rows,
+    render_job,
+    viewer_annotations,
+)
+from .documents import document_page_rows, stitch_documents
+from .importers import JobImporter, detect_format, iter_rows
+from .exports import EXPORT_FORMATS, CSV, export_applications
+from .uploads import issue_upload, receive_local_upload
+from .taskqueue import enqueue
+from .throttling import ApplyRateThrottle, RegisterRateThrottle, SearchRateThrottle
+from .tasks import (
+    delete_resume_files,
+    send_application_status_changed,
+    send_application_submitted,
+)
 
 
 class TenPerPagePagination(PageNumberPagination):
@@ -62,15 +94,26 @@ class RootView(APIView):
         )
 
 
+def enqueue_resume_cleanup(applications):
+    """
+    Queues deletion of the resume files of applications about to be
+    cascade-deleted; the task only runs if the delete commits.
+    """
+    names = [name for name in applications.values_list("resume", flat=True) if name]
+    if names:
+        enqueue(delete_resume_files, names=names)
+
+
 @extend_schema(
     tags=["companies"],
 )
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ReplicaReadMixin, CachedReadMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all().select_related("owner")
     serializer_class = CompanySerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, NearFilter, OrderingFilter]
     search_fields = ["name", "description", "website"]
     ordering_fields = ["name", "created_at"]
+    pagination_class = PageOrCursorPagination
 
     def get_permissions(self):
         if self.action == "create":
@@ -79,17 +122,35 @@ class CompanyViewSet(viewsets.ModelViewSet):
             return [IsCompanyOwnerOrAdmin()]
         return [AllowAny()]
 
+    def get_cache_scopes(self):
+        if self.action == "retrieve":
+            return [f"company:{self.kwargs['pk']}"]
+        return ["companies"]
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            enqueue_resume_cleanup(JobApplication.objects.filter(job__company=instance))
+            instance.delete()
+
 
 @extend_schema(
     tags=["jobs"],
 )
-class JobViewSet(viewsets.ModelViewSet):
-    queryset = Job.objects.select_related("company", "posted_by")
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+class JobViewSet(ReplicaReadMixin, CachedReadMixin, viewsets.ModelViewSet):
+    queryset = Job.objects.select_related("company", "posted_by").defer("search_vector")
+    filter_backends = [
+        DjangoFilterBackend,
+        JobSearchFilter,
+        NearFilter,
+        JobOrderingFilter,
+    ]
     filterset_class = JobFilter
+    pagination_class = PageOrCursorPagination
+    throttle_classes = [SearchRateThrottle]
+    # Only used by JobSearchFilter when no full-text engine is available.
     search_fields = [
         "title",
         "description",
@@ -98,29 +159,140 @@ class JobViewSet(viewsets.ModelViewSet):
         "posted_by__email",
         "category",
     ]
-    ordering_fields = ["title", "created_at", "salary", "min_experience_years"]
+    ordering_fields = [
+        "title",
+        "created_at",
+        "salary",
+        "min_experience_years",
+        "relevance",
+        "distance",
+        *ORDERING_COUNTERS,
+    ]
+    cached_actions = ("list", "retrieve", "facets")
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             return JobCreateSerializer
         return JobSerializer
 
+    def list(self, request, *args, **kwargs):
+        response = self.cached_response(request, self.list_rows, *args, **kwargs)
+        patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(request, self.retrieve_row, *args, **kwargs)
+        patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    # Reads skip JobSerializer: lists stitch pre-rendered documents for the
+    # page's ids (config.documents) and details render a flat `.values()`
+    # row (config.representations). The output is identical either way.
+    # Authenticated users also get their VIEWER_FIELDS for each job.
+
+    def list_rows(self, request, *args, **kwargs):
+        queryset = document_page_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = add_viewer_state(stitch_documents(page), request.user)
+            return self.get_paginated_response(data)
+        return Response(add_viewer_state(stitch_documents(queryset), request.user))
+
+    def retrieve_row(self, request, *args, **kwargs):
+        annotations = viewer_annotations(request.user)
+        queryset = job_rows(
+            self.filter_queryset(self.get_queryset()).annotate(**annotations)
+        )
+        row = get_object_or_404(queryset, pk=kwargs["pk"])
+        data = render_job(row)
+        for field in annotations:
+            data[field] = row[field]
+        return Response(data)
+
+    def get_cache_scopes(self):
+        scopes = []
+        if self.action in ("list", "retrieve") and self.request.user.is_authenticated:
+            scopes.append(f"user:{self.request.user.pk}")
+        if self.action == "retrieve":
+            return [*scopes, f"job:{self.kwargs['pk']}"]
+        # Listings of a single company only go stale when that company or
+        # one of its jobs changes.
+        company_ids = self.request.query_params.getlist("company__id")
+        if len(company_ids) == 1 and company_ids[0].isdigit():
+            scopes.append(f"company:{company_ids[0]}")
+        else:
+            scopes.append("jobs")
+        ordering = self.request.query_params.get("ordering", "")
+        if any(
+            term.strip().lstrip("-") in ORDERING_COUNTERS
+            for term in ordering.split(",")
+        ):
+            scopes.append(COUNTERS_SCOPE)
+        if self.request.query_params.get("salary_in"):
+            scopes.append(SALARY_RATES_SCOPE)
+        return scopes
+
     def get_permissions(self):
         if self.action == "create":
             return [IsAuthenticated(), IsCompanyOwnerOrAdmin()]
         if self.action in ("update", "partial_update", "destroy"):
             return [IsAuthenticated(), IsCompanyOwnerOrAdmin()]
+        if self.action == "bulk":
+            # Company ownership is checked per row by the importer.
+            return [IsAuthenticated()]
         return [AllowAny()]
 
     def perform_create(self, serializer):
         company = serializer.validated_data.get("company")
         user = self.request.user
-        if not (company.owner == user or user.role == "admin"):
+        if not (company.owner_id == user.pk or user.role == "admin"):
             raise PermissionDenied(
                 "You must be the company owner or admin to create a job"
             )
         serializer.save(posted_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            enqueue_resume_cleanup(instance.applications.all())
+            instance.delete()
+
+    @extend_schema(responses=JobFacetsSerializer)
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def facets(self, request):
+        """
+        Per-value job counts for the sidebar filters, honouring the same
+        JobFilter and search parameters as the list endpoint.
+        """
+        return self.cached_response(request, self.get_facets_response)
+
+    def get_facets_response(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(job_facets(queryset))
+
+    @extend_schema(
+        request={"multipart/form-data": JobImportSerializer},
+        responses=JobImportReportSerializer,
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[MultiPartParser],
+        serializer_class=JobImportSerializer,
+    )
+    def bulk(self, request):
+        """
+        Upsert jobs from a CSV or JSON Lines file, keyed on
+        (company_id, external_id). Returns a per-row error report.
+        """
+        serializer = JobImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get("file_format") or detect_format(
+            upload.name
+        )
+        report = JobImporter(request.user).run(iter_rows(upload.file, file_format))
+        return Response(report)
+
 
 @extend_schema(
     tags=["applications"],
@@ -141,7 +313,9 @@ class JobApplicationViewSet(
     filterset_fields = ["job__id", "status", "applicant__id", "job__company__id"]
     search_fields = ["job__title", "applicant__email"]
     ordering_fields = ["created_at"]
-    parser_classes = [MultiPartParser, FormParser]
+    pagination_class = PageOrCursorPagination
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    throttle_classes = [ApplyRateThrottle]
 
     def get_serializer_class(self):
         if self.action in ("update", "partial_update"):
@@ -155,6 +329,8 @@ class JobApplicationViewSet(
             return [IsAuthenticated()]
         if self.action == ("list", "retrieve"):
             return [IsAuthenticated()]
+        if self.action in ("export", "upload_url"):
+            return [IsAuthenticated()]
         return [AllowAny()]
 
     def get_queryset(self):
@@ -167,9 +343,8 @@ class JobApplicationViewSet(
         if user.is_superuser or getattr(user, "role", None) == "admin":
             return JobApplication.objects.all()
 
-        company_ids = user.companies.values_list("id", flat=True)
         return JobApplication.objects.filter(
-            models.Q(applicant=user) | models.Q(job__company__in=company_ids)
+            models.Q(applicant=user) | models.Q(job__company__owner=user)
         )
 
     def perform_create(self, serializer):
@@ -177,23 +352,110 @@ class JobApplicationViewSet(
         user = self.request.user
         if not job.is_active:
             raise ValidationError("Job is not active")
-        serializer.save(applicant=user)
+        with transaction.atomic():
+            application = serializer.save(applicant=user)
+            counters.application_created(application)
+        enqueue(send_application_submitted, application_id=application.pk)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Lock the row so concurrent status changes count exactly once.
+            previous_status = (
+                JobApplication.objects.select_for_update()
+                .values_list("status", flat=True)
+                .get(pk=serializer.instance.pk)
+            )
+            application = serializer.save()
+            counters.application_status_changed(
+                application.job_id, previous_status, application.status
+            )
+        if application.status != previous_status:
+            enqueue(
+                send_application_status_changed,
+                application_id=application.pk,
+                status=application.status,
+            )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("export_format", enum=list(EXPORT_FORMATS), default=CSV)
+        ],
+        responses={
+            (200, "text/csv"): OpenApiTypes.STR,
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+        },
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """
+        Streams every application visible to the user, with the list filters
+        applied, as CSV or NDJSON.
+        """
+        # Not "format": DRF reserves that for choosing a response renderer.
+        export_format = request.query_params.get("export_format", CSV)
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"export_format": [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]}
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_applications(queryset, export_format)
+
+    @extend_schema(
+        request=ResumeUploadRequestSerializer, responses=ResumeUploadSerializer
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="upload-url",
+        parser_classes=[JSONParser],
+        serializer_class=ResumeUploadRequestSerializer,
+    )
+    def upload_url(self, request):
+        """
+        Returns a URL to PUT a resume to directly, and the upload token to
+        send as `resume_upload` when creating the application.
+        """
+        serializer = ResumeUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = issue_upload(request, serializer.validated_data["content_type"])
+        return Response(upload, status=201)
+
+
+@extend_schema(tags=["applications"], request=bytes, responses={204: None})
+class ResumeUploadView(APIView):
+    """
+    Upload target for presigned resume URLs when files are stored locally
+    (e.g. in development); object storage receives uploads directly.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    # The body is read as a raw stream, never parsed.
+    parser_classes = []
+
+    def put(self, request, token):
+        receive_local_upload(token, request.content_type, request.stream)
+        return Response(status=204)
 
 
 @extend_schema(
     tags=["favorites"],
 )
 class FavoriteViewSet(
+    ReplicaReadMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
 ):
     serializer_class = FavoriteSerializer
-    queryset = Favorite.objects.select_related("job", "user").all()
+    # Job.__str__ includes the company name.
+    queryset = Favorite.objects.select_related("job__company", "user").all()
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ["job__id", "user__id"]
     search_fields = ["job__title", "job__company__name", "user__email"]
+    ordering_fields = ["created_at"]
+    pagination_class = PageOrCursorPagination
 
     def get_permissions(self):
         return [IsAuthenticated()]
@@ -202,7 +464,16 @@ class FavoriteViewSet(
         return self.queryset.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            favorite = serializer.save(user=self.request.user)
+            counters.favorite_created(favorite)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = Favorite.objects.filter(pk=instance.pk).delete()
+            # A concurrent request may have deleted it already.
+            if deleted:
+                counters.favorite_deleted(instance)
 
 
 @extend_schema(
@@ -218,3 +489,6 @@ class UserListView(generics.ListAPIView):
 class RegisterUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    # Registration needs no credentials; don't spend a hash on any sent.
+    authentication_classes = []
+    throttle_classes = [RegisterRateThrottle]
@@ -5,10 +5,21 @@ set -e
 mkdir -p /app/staticfiles
 mkdir -p /app/mediafiles
 
+# Prometheus metric files; management commands below write some too, and
+# gunicorn clears them when it starts (see gunicorn.conf.py)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Apply database migrations
 echo "Applying database migrations..."
 python manage.py migrate --noinput
 
+# Store documents of jobs added or changed by migrations (e.g. after a
+# DOCUMENT_VERSION bump); list reads never write them
+echo "Rendering outdated job documents..."
+python manage.py rebuild_job_documents --outdated
+
 # Determine environment (development vs production)
 if [[ "$DJANGO_SETTINGS_MODULE" == *".prod"* ]] || [[ "$DEBUG" == "0" ]]; then
   echo "Running in production mode"
@@ -16,6 +27,10 @@ if [[ "$DJANGO_SETTINGS_MODULE" == *".prod"* ]] || [[ "$DEBUG" == "0" ]]; then
   # Collect static files (required for production)
   echo "Collecting static files..."
   python manage.py collectstatic --noinput
+
+  # Generate the OpenAPI schema once instead of in every worker
+  echo "Building the OpenAPI schema..."
+  python manage.py build_schema
 else
   echo "Running in development mode"
 
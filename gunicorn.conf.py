@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, picked up automatically from the working directory by
+both the WSGI and the ASGI (uvicorn worker) services.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    # Metric files of a previous run would otherwise be merged into this one.
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -74,10 +74,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.middleware.SQLInstrumentationMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "config.replicas.ReadYourWritesMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -109,14 +112,111 @@ WSGI_APPLICATION = "jobs_board.wsgi.application"
 
 DATABASES = {"default": env.db("DATABASE_URL")}
 
-# Add connection pooling options for production external database
-if not DEBUG:
-    DATABASES["default"]["CONN_MAX_AGE"] = 60  # 60 seconds connection persistence
-    DATABASES["default"]["OPTIONS"] = {
-        "connect_timeout": 10,
-        "sslmode": "require",  # Use SSL in production
+# Read replicas (config.replicas), e.g. two local SQLite files or Postgres
+# databases: DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3
+for number, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), 1):
+    DATABASES[f"replica{number}"] = {
+        **env.db_url_config(url),
+        # Tests run every alias against the primary's test database.
+        "TEST": {"MIRROR": "default"},
     }
 
+# Connection pooling (psycopg 3). Pools are per worker process, so keep
+# DATABASE_POOL_MAX_SIZE x workers (of every service) under the server's
+# max_connections. config.dbpool resets pools inherited across forks.
+DATABASE_POOL = env.bool("DATABASE_POOL", default=not DEBUG)
+DATABASE_POOL_OPTIONS = {
+    "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=2),
+    "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=4),
+    # Seconds a request waits for a free connection before failing.
+    "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+    # Idle connections above min_size are closed after this many seconds.
+    "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=300.0),
+    "max_lifetime": env.float("DATABASE_POOL_MAX_LIFETIME", default=3600.0),
+}
+
+for database in DATABASES.values():
+    if not DEBUG:
+        database["OPTIONS"] = {
+            "connect_timeout": 10,
+            "sslmode": "require",  # Use SSL in production
+        }
+    if DATABASE_POOL and database["ENGINE"] == "django.db.backends.postgresql":
+        # The pool keeps connections open instead of each thread.
+        database["CONN_MAX_AGE"] = 0
+        # Check connections as they leave the pool.
+        database["CONN_HEALTH_CHECKS"] = env.bool(
+            "DATABASE_POOL_HEALTH_CHECKS", default=True
+        )
+        database.setdefault("OPTIONS", {})["pool"] = dict(DATABASE_POOL_OPTIONS)
+    elif not DEBUG:
+        database["CONN_MAX_AGE"] = 60  # 60 seconds connection persistence
+
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+# Seconds a client reads from the primary after a successful write.
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=10)
+# Replicas further behind than this (in seconds) are skipped.
+DATABASE_REPLICA_MAX_LAG = env.float("DATABASE_REPLICA_MAX_LAG", default=5.0)
+DATABASE_REPLICA_CHECK_INTERVAL = env.float(
+    "DATABASE_REPLICA_CHECK_INTERVAL", default=5.0
+)
+
+
+# Cache
+# Redis is shared by every worker; the local-memory fallback is per process.
+
+if env.bool("USE_REDIS_CACHE", default=False):
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": env("REDIS_URL"),
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # Treat an unreachable Redis as a cache miss instead of a 500.
+                "IGNORE_EXCEPTIONS": True,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "jobs-board",
+        }
+    }
+
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=300)
+
+# Share of requests whose SQL is instrumented (0 disables it), and the
+# duration above which a request's full SQL trace is logged. Instrumented
+# responses carry a Server-Timing header for staff users only, or for every
+# client with SQL_SERVER_TIMING set (e.g. in development).
+SQL_INSTRUMENTATION_SAMPLE_RATE = env.float(
+    "SQL_INSTRUMENTATION_SAMPLE_RATE", default=0.0
+)
+SQL_SLOW_REQUEST_MS = env.int("SQL_SLOW_REQUEST_MS", default=500)
+SQL_SERVER_TIMING = env.bool("SQL_SERVER_TIMING", default=False)
+
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "{levelname} {name} {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "loggers": {
+        "config": {
+            "handlers": ["console"],
+            "level": env.str("LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -184,12 +284,30 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "config.authentication.StatelessJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "config.authentication.CachedBasicAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # Token-bucket budgets of config.throttling, per scope and identity kind.
+    "DEFAULT_THROTTLE_RATES": {
+        "login.ip": env("THROTTLE_LOGIN_IP", default="30/min"),
+        "login.email": env("THROTTLE_LOGIN_EMAIL", default="5/min"),
+        "register.ip": env("THROTTLE_REGISTER_IP", default="10/hour"),
+        "register.email": env("THROTTLE_REGISTER_EMAIL", default="3/hour"),
+        "apply.ip": env("THROTTLE_APPLY_IP", default="60/hour"),
+        "apply.user": env("THROTTLE_APPLY_USER", default="20/hour"),
+        "search.ip": env("THROTTLE_SEARCH_IP", default="60/min"),
+        "search.user": env("THROTTLE_SEARCH_USER", default="120/min"),
+    },
+    # Proxies in front of the app (nginx in production), so client IPs are
+    # taken from X-Forwarded-For without trusting client-supplied entries.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0 if DEBUG else 1),
 }
 
 SIMPLE_JWT = {
@@ -197,6 +315,25 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
+# Seconds a user's current token_version is cached by
+# StatelessJWTAuthentication, i.e. how long a revoked token may still work.
+TOKEN_VERSION_CACHE_TIMEOUT = env.int("TOKEN_VERSION_CACHE_TIMEOUT", default=30)
+
+# CachedBasicAuthentication: how long and how many verified credentials are
+# remembered per process, and how many failed attempts per client and
+# username, and per client across usernames, are allowed within the failure
+# window (seconds).
+BASIC_AUTH_CACHE_TTL = env.int("BASIC_AUTH_CACHE_TTL", default=60)
+BASIC_AUTH_CACHE_SIZE = env.int("BASIC_AUTH_CACHE_SIZE", default=1024)
+BASIC_AUTH_FAILURE_LIMIT = env.int("BASIC_AUTH_FAILURE_LIMIT", default=10)
+BASIC_AUTH_CLIENT_FAILURE_LIMIT = env.int(
+    "BASIC_AUTH_CLIENT_FAILURE_LIMIT", default=100
+)
+BASIC_AUTH_FAILURE_WINDOW = env.int("BASIC_AUTH_FAILURE_WINDOW", default=300)
+
+# Where the precomputed OpenAPI schema is stored (config.schema).
+OPENAPI_SCHEMA_DIR = env("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "schema"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Jobs Board API",
     "DESCRIPTION": "Comprehensive API for Jobs Board and Jobs Board Admin",
@@ -288,3 +425,28 @@ else:
     # 4) URLs your templates will use
     STATIC_URL = f"https://{R2_ENDPOINT.replace('https://','')}/{R2_BUCKET}/static/"
     MEDIA_URL = f"https://{R2_ENDPOINT.replace('https://','')}/{R2_BUCKET}/media/"
+
+# Direct-to-storage resume uploads (see config/uploads.py)
+RESUME_UPLOAD_MAX_BYTES = env.int("RESUME_UPLOAD_MAX_BYTES", default=5 * 1024 * 1024)
+# Each type needs an entry in config.uploads.MAGIC_BYTES.
+RESUME_UPLOAD_CONTENT_TYPES = [
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+]
+# Seconds a presigned upload URL stays valid.
+RESUME_UPLOAD_EXPIRY = env.int("RESUME_UPLOAD_EXPIRY", default=600)
+# Seconds an upload token can be used to create an application.
+RESUME_UPLOAD_TOKEN_MAX_AGE = env.int("RESUME_UPLOAD_TOKEN_MAX_AGE", default=3600)
+
+EMAIL_BACKEND = env.str(
+    "EMAIL_BACKEND", default="django.core.mail.backends.console.EmailBackend"
+)
+DEFAULT_FROM_EMAIL = env.str("DEFAULT_FROM_EMAIL", default="noreply@jobs-board.local")
+
+# Background tasks (see config/taskqueue.py). With TASKS_EAGER, tasks run
+# in-process after commit instead of through `manage.py run_tasks`.
+TASKS_EAGER = env.bool("TASKS_EAGER", default=False)
+# Seconds a claimed task stays hidden from other workers before it is
+# considered abandoned and retried.
+TASKS_VISIBILITY_TIMEOUT = env.int("TASKS_VISIBILITY_TIMEOUT", default=300)
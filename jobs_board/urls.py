@@ -20,8 +20,9 @@ from django.urls import path, include
 
 # from rest_framework import permissions
 from config.views import RootView
+from config.metrics import metrics_view
+from config.schema import CachedSpectacularAPIView
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
@@ -34,7 +35,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("config.urls")),
     path("", RootView.as_view(), name="root"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("metrics", metrics_view, name="metrics"),
+    path("api/schema/", CachedSpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/",
         SpectacularSwaggerView.as_view(url_name="schema"),